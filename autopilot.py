@@ -0,0 +1,315 @@
+import math
+import sys
+import time
+
+import engine
+from entities import LIFE, SHIELD, POWER_UP, HAZARD, SPENT, KIND_FLAGS, HITBOXES, JUMP_CLEARS, DUCK_CLEARS
+# Autopilot for cheat_mode and the headless runners. Every few ticks it looks at
+# what will pass through the player's collision window over the next
+# `horizon_ms`, in all three lanes, and searches the key presses that could be
+# made at each decision point (nothing, 'a', 'd', ' ', 's'). The search is a
+# depth-bounded dynamic program over (decision, lane, ticks into the jump,
+# ticks into the duck): those states are memoized, so branching 5 ways per
+# decision never blows up, and at most `max_states` of them are expanded per
+# plan. Past that the remaining branches are scored by coasting (no more
+# presses), so a crowded road costs a bounded amount of time and the first
+# decision still weighs every key. Jumps and ducks follow engine.step()'s
+# timing exactly (jump_duration, jump_height_max, duck_duration) and presses
+# obey keyboard()'s rules: no lane change past the edge, no jump or duck while
+# jumping.
+#
+# What each entity means for the player (the ticks it is in reach, what clears
+# it) is worked out once, when it comes into view, into per-lane tables in
+# absolute ticks that carry over between plans. They are rebuilt only when the
+# road speed or a pickup's worth changes or something leaves the road early
+# (collected, or spent on the player).
+#
+#   pilot = Autopilot()
+#   key = pilot(state)   # call before each tick, press the key if there is one
+#WEIGHTS----------------------------------------------------------------------------------
+HIT_COST = 1000.0       # losing a life
+FREE_HIT_COST = 1.0     # touching a hazard while the shield covers it
+PRESS_COST = 0.05       # keeps it from pressing keys for nothing
+OFF_CENTRE_COST = 0.002  # per tick, the middle lane leaves two ways out
+PICKUP_VALUE = {LIFE: 300.0, SHIELD: 200.0, POWER_UP: 50.0}
+
+PLAYER_Z = engine.player_z
+REACH = engine.hit_reach  # widest any kind reaches
+# Plans are made on exact tick counts, the engine measures elapsed float ms. These
+# keep a plan from relying on a jump clearing by 1e-15 or a duck lasting to its
+# very last tick.
+HEIGHT_MARGIN = 0.05
+REACH_MARGIN = 0.05
+NOT_ACTIVE = -1  # jump/duck phase when not jumping/ducking
+
+#AUTOPILOT----------------------------------------------------------------------------------
+class Autopilot:
+    __slots__ = ('horizon_ms', 'decision_ms', 'max_states', 'decision_ticks', 'next_plan', 'memo', 'expanded',
+                 'tables', 'heights', 'jump_ticks', 'duck_ticks', 'decisions', 'calm_from', 'birdless_from',
+                 'vulnerable_from', 'plans', 'lanes', 'origin', 'seen', 'table_key', 'tick_ms')
+
+    def __init__(self, horizon_ms=1000, decision_ms=100, max_states=200):
+        self.horizon_ms = horizon_ms
+        self.decision_ms = decision_ms
+        self.max_states = max_states  # search states expanded per plan
+        self.decision_ticks = 1
+        self.next_plan = None
+        self.plans = 0
+        self.table_key = None  # what the carried-over tables were built for
+        self.tick_ms = None    # what the jump arc was worked out for
+
+    # Policy interface (runner.py, cheat mode): the key to press before this tick
+    def __call__(self, state):
+        if self.next_plan is not None and 0 < self.next_plan - state.tick_count <= self.decision_ticks:
+            return None  # between decisions
+        key = self.plan(state)[0]
+        self.next_plan = state.tick_count + self.decision_ticks
+        return key
+
+    def plan(self, state):
+        tick_ms = state.tick_ms
+        k = self.decision_ticks = max(1, round(self.decision_ms / tick_ms))
+        self.decisions = max(1, round(self.horizon_ms / tick_ms / k))
+        horizon = self.decisions * k
+        if not self.build_tables(state, horizon):
+            return None, 0.0  # nothing coming, nothing to do
+        if self.tick_ms != tick_ms:
+            self.tick_ms = tick_ms
+            # Ticks spent jumping/ducking, counted the way step() counts elapsed time
+            self.jump_ticks = math.ceil(engine.jump_duration / tick_ms - 1e-9)
+            self.duck_ticks = math.ceil(engine.duck_duration / tick_ms - 1e-9)
+            # Lowest point of the jump during its p-th tick, the arc is checked over
+            # the whole tick
+            arc = [engine.jump_height_max * math.sin(math.pi * p * tick_ms / engine.jump_duration)
+                   for p in range(self.jump_ticks)]
+            self.heights = [min(arc[max(p - 1, 0)], arc[p]) - HEIGHT_MARGIN for p in range(self.jump_ticks)]
+        # Hits before this tick cost nothing (shield up)
+        now = state.sim_time
+        covered = state.timers.end('shield') - now if state.shield_active else 0.0
+        self.vulnerable_from = math.floor(covered / tick_ms) + 1 if covered > 0 else 0
+        self.memo = {}
+        self.expanded = 0
+        self.plans += 1
+
+        jp = round((now - state.jump_start) / tick_ms) if state.jumping else NOT_ACTIVE
+        dp = round((now - state.duck_start) / tick_ms) if state.ducking else NOT_ACTIVE
+        return self.best(0, state.player_lane, jp, dp)
+
+    # Per lane and future tick: (a hazard only a duck clears is touching, height a
+    # jump has to clear or 0, pickup value), from the hitboxes the way
+    # engine.touches() sees them. Returns False when nothing is coming.
+    def build_tables(self, state, horizon):
+        store = state.entities
+        speed = state.road_speed
+        now = state.tick_count
+        lo = PLAYER_Z - REACH - speed * horizon   # anything behind this can't arrive in time
+        hi = PLAYER_Z + REACH
+        coming = []
+        for lane in (-1, 0, 1):
+            for ref in store.near(lane, (lo + hi) / 2, (hi - lo) / 2):
+                q, i = store.row(ref)
+                if not q.flags[i] & SPENT:  # already hit the player, can't again
+                    coming.append((lane, ref, q, i))
+
+        # Carry the tables over unless something they were built from changed (or
+        # a new game started)
+        key = (speed, horizon, self.decision_ticks, tuple(self.pickup_value(state, kind) for kind in PICKUP_VALUE))
+        live = {ref for lane, ref, q, i in coming}
+        if key != self.table_key or now < self.origin or \
+                any(last > now and ref not in live for ref, (first, last) in self.seen.items()):
+            self.table_key = key
+            self.origin = now
+            self.lanes = {lane: ([], [], []) for lane in (-1, 0, 1)}  # birds, ground, pickups
+            self.seen = {}  # ref -> (first, last) absolute tick it is in reach
+        else:
+            self.seen = {ref: ticks for ref, ticks in self.seen.items() if ticks[1] > now}
+            if now - self.origin > 4 * horizon:
+                for columns in self.lanes.values():
+                    for column in columns:
+                        del column[:now - self.origin]
+                self.origin = now
+        for lane, ref, q, i in coming:
+            if ref not in self.seen:
+                self.add(state, lane, ref, q, i)
+
+        base = now - self.origin
+        end = base + horizon + 1
+        k = self.decision_ticks
+        self.tables = {}
+        last_bird = 0
+        for lane, (birds, ground, pickups) in self.lanes.items():
+            for column, empty in ((birds, False), (ground, 0.0), (pickups, 0.0)):
+                if len(column) < end:
+                    column.extend([empty] * (end - len(column)))
+            birds, ground, pickups = birds[base:end], ground[base:end], pickups[base:end]
+            # Per decision: any hazard in it, pickup value in it
+            danger = [any(birds[d * k + 1:d * k + k + 1]) or any(ground[d * k + 1:d * k + k + 1])
+                      for d in range(self.decisions)]
+            if any(birds):
+                last_bird = max(last_bird, horizon - birds[::-1].index(True))
+            bonus = [sum(pickups[d * k + 1:d * k + k + 1]) for d in range(self.decisions)]
+            self.tables[lane] = (birds, ground, pickups, danger, bonus)
+        # Past the last decision with a hazard in it jumping and ducking change
+        # nothing, and past the last bird ducking doesn't. The search forgets
+        # those phases there, which is most of the states.
+        self.calm_from = max((d + 1 for birds, ground, pickups, danger, bonus in self.tables.values()
+                              for d in range(self.decisions) if danger[d]), default=0)
+        self.birdless_from = (last_bird + k - 1) // k
+        return any(first <= now + horizon for first, last in self.seen.values())
+
+    # Enters an entity that just came into view into its lane's tables, at the
+    # absolute ticks its hitbox is in reach of the player's (swept, like
+    # check_collision)
+    def add(self, state, lane, ref, q, i):
+        kind = ref[0]
+        speed = state.road_speed
+        now = state.tick_count
+        z = state.entities.travel - q.mark[i]
+        z_half, bottom, top, cleared_by = HITBOXES[kind]
+        reach = z_half + engine.player_half_depth
+        first = max(1, int((PLAYER_Z - reach - z) / speed))
+        last = int((PLAYER_Z + reach - z) / speed) + 2
+        ticks = [t for t in range(first, last + 1)
+                 if z + speed * t > PLAYER_Z - reach - REACH_MARGIN
+                 and z + speed * (t - 1) < PLAYER_Z + reach + REACH_MARGIN]
+        if not ticks:
+            return
+        self.seen[ref] = (now + ticks[0], now + ticks[-1])
+        birds, ground, pickups = self.lanes[lane]
+        end = now + ticks[-1] - self.origin + 1
+        for column, empty in ((birds, False), (ground, 0.0), (pickups, 0.0)):
+            if len(column) < end:
+                column.extend([empty] * (end - len(column)))
+        at = now - self.origin
+        if KIND_FLAGS[kind] & HAZARD:
+            if cleared_by & JUMP_CLEARS:
+                clearance = q.height[i] + top
+            elif cleared_by & DUCK_CLEARS and engine.duck_height < q.height[i] + bottom - HEIGHT_MARGIN:
+                clearance = 0.0
+            else:
+                clearance = math.inf  # only leaving the lane helps
+            for t in ticks:
+                if clearance:
+                    ground[at + t] = max(ground[at + t], clearance)
+                else:
+                    birds[at + t] = True
+        else:
+            value = self.pickup_value(state, kind) / len(ticks)
+            for t in ticks:
+                pickups[at + t] += value
+
+    def pickup_value(self, state, kind):
+        if kind == LIFE and state.player_life >= engine.max_life:
+            return 0.0
+        if kind == SHIELD and state.shield_active:
+            return PICKUP_VALUE[SHIELD] / 4  # only restarts the timer
+        return PICKUP_VALUE[kind]
+
+    # Reward for the ticks of decision `d` spent in `lane`, starting from jump/duck
+    # phases jp/dp, returns (reward, jp, dp) after them
+    def segment(self, d, lane, jp, dp):
+        birds, ground, pickups, danger, bonus = self.tables[lane]
+        k = self.decision_ticks
+        if not danger[d]:
+            # Nothing to hit, the phases just run on
+            if jp != NOT_ACTIVE:
+                jp = jp + k if jp + k < self.jump_ticks else NOT_ACTIVE
+            if dp != NOT_ACTIVE:
+                dp = dp + k if dp + k < self.duck_ticks else NOT_ACTIVE
+            return bonus[d] - (OFF_CENTRE_COST * k if lane else 0.0), jp, dp
+        reward = 0.0
+        for t in range(d * k + 1, d * k + k + 1):
+            if jp != NOT_ACTIVE:
+                jp += 1
+                if jp >= self.jump_ticks:
+                    jp = NOT_ACTIVE
+            if dp != NOT_ACTIVE:
+                dp += 1
+                if dp >= self.duck_ticks:
+                    dp = NOT_ACTIVE
+            hit = (birds[t] and (dp == NOT_ACTIVE or dp == self.duck_ticks - 1)) or \
+                  (ground[t] and not (jp != NOT_ACTIVE and self.heights[jp] > ground[t]))
+            if hit:
+                reward -= HIT_COST if t >= self.vulnerable_from else FREE_HIT_COST
+            reward += pickups[t]
+            if lane:
+                reward -= OFF_CENTRE_COST
+        return reward, jp, dp
+
+    # Value of pressing nothing more from decision `d` on
+    def coast(self, d, lane, jp, dp):
+        value = 0.0
+        for d in range(d, self.decisions):
+            reward, jp, dp = self.segment(d, lane, jp, dp)
+            value += reward
+        return value
+
+    # Best (key, value) from decision `d` onwards, memoized on the whole state
+    def best(self, d, lane, jp, dp):
+        if d >= self.birdless_from:
+            dp = NOT_ACTIVE
+            if d >= self.calm_from:
+                jp = NOT_ACTIVE
+        key = (d, lane, jp, dp)
+        cached = self.memo.get(key)
+        if cached is not None:
+            return cached
+        if self.expanded >= self.max_states:
+            result = self.memo[key] = (None, self.coast(d, lane, jp, dp))
+            return result
+        self.expanded += 1
+        jumping = jp != NOT_ACTIVE
+        options = [(None, lane, jp, dp, 0.0)]
+        if lane > -1:
+            options.append(('a', lane - 1, jp, dp, PRESS_COST))
+        if lane < 1:
+            options.append(('d', lane + 1, jp, dp, PRESS_COST))
+        if not jumping:
+            options.append((' ', lane, 0, dp, PRESS_COST))
+            options.append(('s', lane, jp, 0, PRESS_COST))
+        result = None
+        for press, l, j, u, cost in options:
+            value, j, u = self.segment(d, l, j, u)
+            value -= cost
+            if d + 1 < self.decisions:
+                value += self.best(d + 1, l, j, u)[1]
+            if result is None or value > result[1]:
+                result = (press, value)
+        self.memo[key] = result
+        return result
+
+#HEADLESS----------------------------------------------------------------------------------
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    minutes = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    times = []  # wall seconds per plan
+    cpu = []    # CPU seconds per plan, without what the OS scheduler adds
+    most_states = 0
+    lives = []
+    for seed in range(games):
+        pilot = Autopilot()
+        state = engine.GameState()
+        engine.new_game(state, seed)
+        for _ in range(int(minutes * 60 * state.tick_rate)):
+            plans = pilot.plans
+            t0, c0 = time.perf_counter(), time.thread_time()
+            key = pilot(state)
+            elapsed, used = time.perf_counter() - t0, time.thread_time() - c0
+            if pilot.plans != plans:
+                times.append(elapsed)
+                cpu.append(used)
+                most_states = max(most_states, pilot.expanded)
+            if key:
+                engine.keyboard(state, key)
+            engine.step(state)
+            if state.over:
+                break
+        lives.append(state.player_life)
+        print(f"seed {seed}: {state.tick_count / state.tick_rate:.0f}s, score {state.score}, "
+              f"lives {state.player_life}, lost to {state.lives_lost_to}")
+    print(f"{sum(l > 0 for l in lives)}/{games} survived {minutes} minutes, {len(times)} plans, "
+          f"at most {most_states} states expanded")
+    for name, samples in (('wall', times), ('cpu', cpu)):
+        samples.sort()
+        print(f"  {name}: mean {sum(samples) / len(samples) * 1000:.2f}ms, "
+              f"p99 {samples[int(len(samples) * 0.99)] * 1000:.2f}ms, worst {samples[-1] * 1000:.1f}ms")
@@ -0,0 +1,305 @@
+import sys
+import time
+
+import numpy as np
+
+import engine
+from engine import (jump_duration, jump_height_max, duck_duration, max_life, shield_duration, max_shields,
+                    player_z, player_half_depth, hit_reach, player_height, duck_height)
+from entities import (KINDS, BIRD, LIFE, SHIELD, POWER_UP, HAZARD, KIND_FLAGS, DESPAWN_POINTS,
+                      SPAWN_Z, DESPAWN_Z, HITBOXES, JUMP_CLEARS, DUCK_CLEARS)
+from spawning import SPAWN_RATES
+# N independent games stepped in lockstep. Every per-game field of GameState is
+# a length-N array here and the entities of all games sit in one (N, capacity)
+# slot table, so a tick is a handful of whole-array operations instead of N
+# trips through engine.step(). The rules are engine.step()/check_collision()'s,
+# the random numbers come from one NumPy generator per batch, so a batch game
+# plays like a GameState game but not with the same spawns for the same seed.
+#
+#   world = BatchWorld(4096, seed=1)
+#   while True:
+#       world.step(actions)   # one action per game, see ACTIONS
+#ACTIONS----------------------------------------------------------------------------------
+NOOP, LEFT, RIGHT, JUMP, DUCK = range(5)
+ACTIONS = range(5)
+ACTION_KEYS = (None, 'a', 'd', ' ', 's')  # what each action presses in engine.keyboard()
+
+EMPTY = -1  # kind of a free entity slot, its mark is +inf so its z is -inf
+IS_HAZARD = np.array([flags & HAZARD != 0 for flags in KIND_FLAGS])
+POINTS = np.array(DESPAWN_POINTS, dtype=np.int64)
+# entities.HITBOXES by column, indexed by kind
+BOX_REACH = np.array([box[0] for box in HITBOXES]) + player_half_depth
+BOX_BOTTOM = np.array([box[1] for box in HITBOXES])
+BOX_TOP = np.array([box[2] for box in HITBOXES])
+BOX_JUMP = np.array([box[3] & JUMP_CLEARS != 0 for box in HITBOXES])
+BOX_DUCK = np.array([box[3] & DUCK_CLEARS != 0 for box in HITBOXES])
+
+# (game, column) index pairs of a 2D mask, much faster than mask.nonzero()
+def cells(mask):
+    return np.divmod(np.flatnonzero(mask), mask.shape[1])
+
+#WORLD----------------------------------------------------------------------------------
+class BatchWorld:
+    __slots__ = (
+        'n', 'tick_rate', 'tick_ms', 'rng',
+        # per game, shape (N,)
+        'score', 'high_score', 'over', 'lane', 'jumping', 'jump_start', 'jump_height',
+        'ducking', 'duck_start', 'life', 'shield_active', 'shield_start',
+        'road_speed', 'travel', 'sim_time', 'tick_count',
+        # per game and kind, shape (N, len(KINDS))
+        'rates', 'next_due', 'spawned', 'lives_lost_to',
+        # entity slots, shape (N, capacity), `spent` is entities.SPENT
+        'kind', 'e_lane', 'mark', 'height', 'spent',
+    )
+
+    def __init__(self, n, seed=None, tick_rate=engine.default_tick_rate, road_speed=0.3,
+                 rates=SPAWN_RATES, capacity=32):
+        self.n = n
+        self.tick_rate = tick_rate
+        self.tick_ms = 1000.0 / tick_rate
+        self.rng = np.random.default_rng(seed)
+        self.high_score = np.zeros(n, dtype=np.int64)
+        # Rates/speeds may be one value for all games or one per game
+        self.road_speed = np.broadcast_to(np.asarray(road_speed, dtype=np.float64), (n,)).copy()
+        self.rates = np.broadcast_to(np.asarray(rates, dtype=np.float64), (n, len(KINDS))).copy()
+        self.kind = np.full((n, capacity), EMPTY, dtype=np.int8)
+        self.e_lane = np.zeros((n, capacity), dtype=np.int8)
+        self.mark = np.full((n, capacity), np.inf)
+        self.height = np.zeros((n, capacity))
+        self.spent = np.zeros((n, capacity), dtype=bool)
+        for name, dtype in (('score', np.int64), ('over', bool), ('lane', np.int8),
+                            ('jumping', bool), ('jump_start', np.float64), ('jump_height', np.float64),
+                            ('ducking', bool), ('duck_start', np.float64), ('life', np.int64),
+                            ('shield_active', bool), ('shield_start', np.float64), ('travel', np.float64),
+                            ('sim_time', np.float64), ('tick_count', np.int64)):
+            setattr(self, name, np.zeros(n, dtype=dtype))
+        self.next_due = np.full((n, len(KINDS)), np.inf)
+        self.spawned = np.zeros((n, len(KINDS)), dtype=np.int64)
+        self.lives_lost_to = np.zeros((n, len(KINDS)), dtype=np.int64)
+        self.reset()
+
+    @property
+    def capacity(self):
+        return self.kind.shape[1]
+
+    # Starts fresh games in the slots picked by `games` (a mask or indices, all
+    # by default), the others carry on
+    def reset(self, games=None):
+        g = np.arange(self.n) if games is None else np.asarray(games)
+        if g.dtype == bool:
+            g = g.nonzero()[0]
+        for name in ('score', 'lane', 'jump_start', 'jump_height', 'duck_start', 'shield_start', 'travel',
+                     'sim_time', 'tick_count', 'spawned', 'lives_lost_to'):
+            getattr(self, name)[g] = 0
+        for name in ('over', 'jumping', 'ducking', 'shield_active'):
+            getattr(self, name)[g] = False
+        self.life[g] = max_life
+        self.kind[g] = EMPTY
+        self.mark[g] = np.inf
+        rates = self.rates[g]
+        with np.errstate(divide='ignore'):
+            self.next_due[g] = np.where(rates > 0, self.rng.exponential(1 / rates), np.inf)
+
+    # Entity positions, z is -inf in free slots
+    def z(self):
+        return self.travel[:, None] - self.mark
+
+    #INPUT----------------------------------------------------------------------------------
+    # engine.keyboard() for every game at once, `actions` holds one of ACTIONS per game
+    def act(self, actions):
+        actions = np.where(self.over, NOOP, actions)
+        lane = self.lane
+        lane -= (actions == LEFT) & (lane > -1)
+        lane += (actions == RIGHT) & (lane < 1)
+        jump = (actions == JUMP) & ~self.jumping
+        self.jumping |= jump
+        self.jump_start[jump] = self.sim_time[jump]
+        duck = (actions == DUCK) & ~self.jumping
+        self.ducking |= duck
+        self.duck_start[duck] = self.sim_time[duck]
+
+    #UPDATE----------------------------------------------------------------------------------
+    # Applies `actions` (None = no input) and runs one tick of every game that is
+    # not over, returns the over mask
+    def step(self, actions=None):
+        if actions is not None:
+            self.act(actions)
+        live = ~self.over
+        self.sim_time += live * self.tick_ms
+        self.tick_count += live
+        now = self.sim_time
+        self.score += live & (self.tick_count % 30 == 0)
+
+        # Jump arc and duck release
+        t = (now - self.jump_start) * (1 / jump_duration)
+        self.jumping &= t < 1.0
+        self.jump_height = np.where(self.jumping, jump_height_max * np.sin(np.pi * t), 0.0)
+        self.ducking &= now - self.duck_start < duck_duration
+
+        # Everything works on marks against per-game limits, z = travel - mark is
+        # never materialised for the whole table
+        travel = self.travel
+        dz = live * self.road_speed
+        travel += dz
+        due = self.next_due <= travel[:, None]
+        if due.any():
+            self.spawn_due(due & live[:, None])
+        self.collide(live, dz)
+
+        # Despawn after the collision check, like engine.step()
+        past = self.mark < (travel - DESPAWN_Z)[:, None]
+        if past.any():
+            g, s = cells(past)
+            np.add.at(self.score, g, POINTS[self.kind[g, s]])
+            self.free(g, s)
+        return self.over
+
+    def free(self, g, s):
+        self.kind[g, s] = EMPTY
+        self.mark[g, s] = np.inf
+
+    def spawn_due(self, due):
+        rng = self.rng
+        while due.any():
+            g, k = cells(due)
+            at = self.next_due[g, k]
+            self.next_due[g, k] = at + rng.exponential(1 / self.rates[g, k])
+            # Limit shields like the engine does, the event is still used up
+            keep = k != SHIELD
+            shields = ~keep
+            if shields.any():
+                keep[shields] = (self.kind[g[shields]] == SHIELD).sum(axis=1) < max_shields
+            g, k, at = g[keep], k[keep], at[keep]
+            # One spawn per game at a time so two kinds due together get different slots
+            first = np.unique(g, return_index=True)[1]
+            rest = np.ones(len(g), dtype=bool)
+            rest[first] = False
+            if rest.any():
+                self.next_due[g[rest], k[rest]] = at[rest]
+            g, k, at = g[first], k[first], at[first]
+            free = self.kind[g] == EMPTY
+            if not free.any(axis=1).all():
+                self.grow()
+                free = self.kind[g] == EMPTY
+            s = free.argmax(axis=1)
+            self.kind[g, s] = k
+            self.e_lane[g, s] = rng.integers(-1, 2, len(g))
+            self.mark[g, s] = at - SPAWN_Z
+            self.height[g, s] = np.where(k == BIRD, rng.uniform(1.5, 2.5, len(g)), 0.0)
+            self.spent[g, s] = False
+            self.spawned[g, k] += 1
+            due = self.next_due <= self.travel[:, None]
+            due &= ~self.over[:, None]
+
+    def grow(self):
+        n, capacity = self.kind.shape
+        for name, fill in (('kind', EMPTY), ('e_lane', 0), ('mark', np.inf), ('height', 0.0), ('spent', False)):
+            old = getattr(self, name)
+            new = np.full((n, capacity * 2), fill, dtype=old.dtype)
+            new[:, :capacity] = old
+            setattr(self, name, new)
+
+    #COLLISION DETECTION----------------------------------------------------------------------------------
+    # engine.jump_height_at()/ducking_at() for games `g` at sim times `t`
+    def jump_height_at(self, g, t):
+        start = self.jump_start[g]
+        elapsed = t - start
+        end = start + jump_duration
+        ended = (self.sim_time[g] - self.tick_ms < end) & (end <= self.sim_time[g])
+        up = (self.jumping[g] | ended) & (elapsed >= 0) & (elapsed < jump_duration)
+        return np.where(up, jump_height_max * np.sin(np.pi / jump_duration * elapsed), 0.0)
+
+    def ducking_at(self, g, t):
+        start = self.duck_start[g]
+        elapsed = t - start
+        end = start + duck_duration
+        ended = (self.sim_time[g] - self.tick_ms < end) & (end <= self.sim_time[g])
+        return (self.ducking[g] | ended) & (elapsed >= 0) & (elapsed < duck_duration)
+
+    def collide(self, live, dz):
+        now = self.sim_time
+        self.shield_active &= now - self.shield_start < shield_duration
+
+        # Swept like check_collision(): the band of marks whose path this tick
+        # came within the widest reach (few hits), then lane and liveness on those
+        centre = self.travel - player_z
+        near = self.mark > (centre - hit_reach - dz)[:, None]
+        near &= self.mark < (centre + hit_reach)[:, None]
+        g, s = cells(near)
+        keep = live[g] & (self.e_lane[g, s] == self.lane[g]) & ~self.spent[g, s]
+        if not keep.any():
+            return
+        g, s = g[keep], s[keep]
+        k = self.kind[g, s].astype(np.intp)
+
+        # engine.touches(): when during the tick each one was within its kind's
+        # reach, then the player's box against its box over that time
+        gdz = dz[g]
+        z0 = self.travel[g] - self.mark[g, s] - gdz
+        reach = BOX_REACH[k]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            still = np.abs(z0 - player_z) < reach
+            f0 = np.where(gdz > 0, np.maximum(0.0, (player_z - reach - z0) / gdz), np.where(still, 0.0, 1.0))
+            f1 = np.where(gdz > 0, np.minimum(1.0, (player_z + reach - z0) / gdz), np.where(still, 1.0, 0.0))
+        contact = f0 <= f1
+        if not contact.any():
+            return
+        g, s, k, f0, f1 = g[contact], s[contact], k[contact], f0[contact], f1[contact]
+        t0 = now[g] - self.tick_ms * (1 - f0)
+        t1 = now[g] - self.tick_ms * (1 - f1)
+        h0, h1 = self.jump_height_at(g, t0), self.jump_height_at(g, t1)
+        peak = self.jump_start[g] + jump_duration / 2
+        low = np.minimum(h0, h1) * BOX_JUMP[k]
+        high = np.where(((h0 > 0) | (h1 > 0)) & (t0 <= peak) & (peak <= t1), jump_height_max,
+                        np.maximum(h0, h1)) * BOX_JUMP[k]
+        ducked = BOX_DUCK[k] & self.ducking_at(g, t0) & self.ducking_at(g, t1)
+        altitude = self.height[g, s]
+        touch = (low < altitude + BOX_TOP[k]) & (high + np.where(ducked, duck_height, player_height)
+                                                 > altitude + BOX_BOTTOM[k])
+        g, s, k = g[touch], s[touch], k[touch]
+
+        # engine.ON_ENTER: every hazard touched is spent and costs a life unless
+        # the shield is up, every pickup is collected. There are no exit handlers,
+        # so contacts aren't tracked past the SPENT flag.
+        hits = IS_HAZARD[k]
+        if hits.any():
+            hg, hk = g[hits], k[hits]
+            self.spent[hg, s[hits]] = True
+            ok = ~self.shield_active[hg]
+            hg, hk = hg[ok], hk[ok]
+            np.subtract.at(self.life, hg, 1)
+            np.add.at(self.lives_lost_to, (hg, hk), 1)
+            dead = np.unique(hg[self.life[hg] <= 0])
+            if len(dead):
+                self.over[dead] = True
+                self.high_score[dead] = np.maximum(self.high_score[dead], self.score[dead])
+
+        pickups = ~hits
+        if pickups.any():
+            g, s, k = g[pickups], s[pickups], k[pickups]
+            m = k == LIFE
+            np.add.at(self.life, g[m], 1)
+            np.minimum(self.life, max_life, out=self.life)
+            m = k == SHIELD
+            self.shield_active[g[m]] = True
+            self.shield_start[g[m]] = now[g[m]]
+            np.add.at(self.score, g[k == POWER_UP], 50)
+            self.free(g, s)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    world = BatchWorld(n, seed=0)
+    rng = np.random.default_rng(1)
+    # Random presses about once a second, finished games restart straight away
+    actions = rng.integers(0, len(ACTIONS), (ticks, n)) * (rng.random((ticks, n)) < 1 / 60)
+    done = 0
+    t0 = time.perf_counter()
+    for tick in range(ticks):
+        over = world.step(actions[tick])
+        done += n
+        if over.any():
+            world.reset(over)
+    elapsed = time.perf_counter() - t0
+    print(f"{n} games x {ticks} ticks = {done} game-ticks in {elapsed:.2f}s "
+          f"({done / elapsed:,.0f} ticks/s), capacity {world.capacity}")
@@ -0,0 +1,471 @@
+import math
+import pickle
+import random
+import sys
+import time
+import zlib
+from entities import (EntityStore, Scenery, KINDS, KIND_NAMES, BIRD, SHIELD, HITBOXES, MAX_HITBOX_Z,
+                      JUMP_CLEARS, DUCK_CLEARS, SPENT)
+from spawning import SpawnScheduler
+from timers import Timers
+# Game logic for 3D SkateShift with no OpenGL in it. All per-game state lives in
+# a GameState, so several games can run side by side in one process. The GLUT
+# window drives one through advance() with a glutGet clock, headless runs call
+# step() directly or use a VirtualClock.
+#JUMPING----------------------------------------------------------------------------------
+jump_duration   = 600    #  ms
+jump_height_max = 2.0    # Peak jump height
+#EXPERIMENTAL-------------------------------------------------------------------------------------
+duck_duration   = 500    # Duck duration in ms (auto-release after this time)
+max_life = 5
+#SHIELD-----------------------------------------------------------------------------------
+shield_duration = 5000  #ms
+max_shields = 1
+#COLLISION-----------------------------------------------------------------------------------
+player_z = 5.0            # where the player stands on the road
+player_half_depth = 0.4   # player's box is player_z +- this along the road
+hit_reach = player_half_depth + MAX_HITBOX_Z  # farthest apart along the road anything can touch the player
+hit_back_z = player_z + hit_reach             # back edge of the player's collision window
+player_height = 2.6       # top of the player's box standing, above the board
+duck_height = 1.2         # and in the duck pose
+#TIMESTEP-----------------------------------------------------------------------------------
+default_tick_rate = 60   # simulation ticks per second (speeds/spawn chances are per tick)
+max_ticks_per_frame = 8  # catch-up limit so one long stall doesn't freeze the game
+
+#CLOCK----------------------------------------------------------------------------------
+# Anything that returns milliseconds works as a clock: glutGet in the window,
+# a VirtualClock for headless runs and tests
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms
+
+#RANDOMNESS----------------------------------------------------------------------------------
+# Separate seeded streams so drawing more or less (pedestrian colours, tree
+# placement) never shifts what gets spawned. Each stream's seed is derived from
+# the game seed and its name.
+STREAMS = ('spawns', 'scenery', 'appearance')
+
+class RandomStreams:
+    __slots__ = STREAMS + ('seed',)
+
+    def __init__(self, seed=None):
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        for name in STREAMS:
+            stream = getattr(self, name, None)
+            if stream is None:
+                setattr(self, name, random.Random(f"{seed}:{name}"))
+            else:
+                stream.seed(f"{seed}:{name}")  # keep the objects, the scheduler holds a reference
+
+    def getstate(self):
+        return self.seed, tuple(getattr(self, name).getstate() for name in STREAMS)
+
+    def setstate(self, state):
+        self.seed, states = state
+        for name, stream_state in zip(STREAMS, states):
+            getattr(self, name).setstate(stream_state)
+
+#STATE----------------------------------------------------------------------------------
+class GameState:
+    __slots__ = (
+        # BASICS
+        'score', 'high_score', 'cheat_mode', 'player_lane', 'player_y', 'over', 'log',
+        # JUMP / DUCK
+        'jumping', 'jump_start', 'jump_height', 'ducking', 'duck_start',
+        # LIFE
+        'player_life',
+        # SHIELD
+        'shield_active',
+        # TIMED EFFECTS (jump, duck, shield)
+        'timers',
+        # ROAD / CORE
+        'road_offset', 'road_speed', 'game_time', 'distance',
+        # STATS (per kind, for batch runs)
+        'spawned', 'lives_lost_to',
+        # TIMESTEP
+        'clock', 'tick_rate', 'tick_ms', 'sim_time', 'tick_count', 'accumulator', 'last_frame_time',
+        # ENTITIES
+        'entities', 'trees', 'spawner', 'rng',
+    )
+
+    def __init__(self, clock=None, tick_rate=default_tick_rate, log=None, seed=None):
+        self.high_score = 0
+        self.cheat_mode = False
+        self.player_y = 0.5    # Base Y pos
+        self.log = log  # eventlog.EventLog for hits/pickups/game over, None logs nothing
+        self.jump_start = 0
+        self.duck_start = 0
+        self.timers = Timers()
+        self.road_speed = 0.3    # Speed of road movement
+        self.clock = clock if clock is not None else VirtualClock()
+        self.sim_time = 0.0      # simulation clock in ms, advances tick_ms per tick
+        self.tick_count = 0
+        self.accumulator = 0.0   # real ms not yet simulated
+        self.last_frame_time = None
+        self.entities = EntityStore()
+        self.trees = Scenery()
+        self.rng = RandomStreams(seed)
+        self.spawner = SpawnScheduler(self.rng.spawns)
+        set_tick_rate(self, tick_rate)
+        reset_game(self)
+
+# Everything but the wall-clock plumbing, which belongs to whoever drives the game
+SNAPSHOT_SKIP = ('clock', 'log', 'accumulator', 'last_frame_time')
+
+# Full game state (player, timers, entities, score, RNG streams) as bytes
+def snapshot(state):
+    fields = {name: getattr(state, name) for name in GameState.__slots__ if name not in SNAPSHOT_SKIP}
+    return zlib.compress(pickle.dumps(fields, pickle.HIGHEST_PROTOCOL))
+
+def restore(state, data):
+    for name, value in pickle.loads(zlib.decompress(data)).items():
+        setattr(state, name, value)
+
+def set_clock(state, fn):
+    state.clock = fn
+    state.last_frame_time = None
+
+def set_tick_rate(state, rate):
+    state.tick_rate = rate
+    state.tick_ms = 1000.0 / rate
+
+# Feeds real elapsed time from the clock into the accumulator and runs as many
+# fixed ticks as are due, returns how many ran. `before_tick(state)` runs ahead
+# of every tick (replay playback feeds its keys there).
+def advance(state, before_tick=None):
+    now = state.clock()
+    if state.last_frame_time is None:
+        state.last_frame_time = now
+    state.accumulator += now - state.last_frame_time
+    state.last_frame_time = now
+
+    tick_ms = state.tick_ms
+    steps = 0
+    while state.accumulator >= tick_ms and steps < max_ticks_per_frame:
+        if before_tick is not None:
+            before_tick(state)
+        step(state)
+        state.accumulator -= tick_ms
+        steps += 1
+    if steps == max_ticks_per_frame:
+        state.accumulator = min(state.accumulator, tick_ms)  # drop the backlog instead of spiralling
+    return steps
+
+#SCENERY----------------------------------------------------------------------------------
+def init_scenery(state):
+    rng = state.rng.scenery
+    trees = []
+    for z in range(-100, 50, 25):  # Trees every 25 units on z-axis
+        #L
+        left_offset = rng.uniform(-12, -8)
+        trees.append({'x': left_offset, 'z': z, 'size': rng.uniform(0.8, 1.2)})
+        #R
+        right_offset = rng.uniform(8, 12)
+        trees.append({'x': right_offset, 'z': z, 'size': rng.uniform(0.8, 1.2)})
+        #EXTRA TREES
+        if rng.random() < 0.5:
+            far_left = rng.uniform(-15, -12)
+            trees.append({'x': far_left, 'z': z + rng.uniform(-10, 10), 'size': rng.uniform(0.6, 1.0)})
+        if rng.random() < 0.5:
+            far_right = rng.uniform(12, 15)
+            trees.append({'x': far_right, 'z': z + rng.uniform(-10, 10), 'size': rng.uniform(0.6, 1.0)})
+    state.trees = Scenery([t['x'] for t in trees], [t['z'] for t in trees], [t['size'] for t in trees])
+
+#COLLISION DETECTION----------------------------------------------------------------------------------
+def hit(state, kind):
+    # Only reduce life if shield not active
+    if not state.shield_active:
+        state.player_life -= 1
+        state.lives_lost_to[kind] += 1
+        if state.log: state.log.info('hit', kind=KIND_NAMES[kind], lives=state.player_life, tick=state.tick_count)
+        if state.player_life <= 0:
+            game_over(state)
+
+# Jump height / whether ducking at sim time `t` during the tick that just ran.
+# The flags already describe the end of the tick, so a jump or duck that ran
+# out during it still counts before it ran out.
+def jump_height_at(state, t):
+    elapsed = t - state.jump_start
+    ended = state.sim_time - state.tick_ms < state.jump_start + jump_duration <= state.sim_time
+    if (state.jumping or ended) and 0 <= elapsed < jump_duration:
+        return jump_height_max * math.sin(math.pi * elapsed / jump_duration)
+    return 0.0
+
+def ducking_at(state, t):
+    elapsed = t - state.duck_start
+    ended = state.sim_time - state.tick_ms < state.duck_start + duck_duration <= state.sim_time
+    return (state.ducking or ended) and 0 <= elapsed < duck_duration
+
+# Lowest and highest the jump gets between sim times t0 and t1 of the tick that
+# just ran: the arc peaks halfway through the jump, so apart from the peak the
+# extremes are at the ends
+def jump_range(state, t0, t1):
+    h0, h1 = jump_height_at(state, t0), jump_height_at(state, t1)
+    peak = state.jump_start + jump_duration / 2
+    high = jump_height_max if (h0 or h1) and t0 <= peak <= t1 else max(h0, h1)
+    return min(h0, h1), high
+
+# Sim times between which something now at `z`, having moved `dz` this tick,
+# was within `reach` of the player (t0 > t1 if it never was)
+def contact_times(state, z, dz, reach):
+    now, tick_ms = state.sim_time, state.tick_ms
+    if dz <= 0:
+        if abs(z - player_z) < reach:
+            return now - tick_ms, now
+        return now, now - tick_ms
+    z0 = z - dz
+    f0 = max(0.0, (player_z - reach - z0) / dz)
+    f1 = min(1.0, (player_z + reach - z0) / dz)
+    return now - tick_ms * (1 - f0), now - tick_ms * (1 - f1)
+
+# The one collision test: the kind's box (HITBOXES, at altitude `height`)
+# against the player's, swept over the tick. The player's box is lifted by the
+# jump for kinds a jump clears and lowered to duck_height for kinds a duck
+# clears, and only counts as clear if it stayed clear the whole time the two
+# overlapped along the road.
+def touches(state, kind, z, height, dz):
+    z_half, bottom, top, cleared_by = HITBOXES[kind]
+    t0, t1 = contact_times(state, z, dz, z_half + player_half_depth)
+    if t0 > t1:
+        return False
+    low, high = jump_range(state, t0, t1) if cleared_by & JUMP_CLEARS else (0.0, 0.0)
+    ducked = cleared_by & DUCK_CLEARS and ducking_at(state, t0) and ducking_at(state, t1)
+    return low < height + top and high + (duck_height if ducked else player_height) > height + bottom
+
+def check_collision(state):
+    store = state.entities
+    dz = state.road_speed
+
+    # Enter events. Swept: everything in the player's lane whose path this tick
+    # came within the widest hitbox's reach, so nothing can skip over the player
+    # however far it moves per tick. touches() sorts out the rest, spent hazards
+    # already had their contact. Nothing happens on exit, so contacts aren't kept.
+    for ref in store.swept(state.player_lane, player_z, hit_reach, dz):
+        q, i = store.row(ref)
+        if q.flags[i] & SPENT or not touches(state, ref[0], store.travel - q.mark[i], q.height[i], dz):
+            continue
+        ON_ENTER[ref[0]](state, ref)
+
+#CONTACT EVENTS----------------------------------------------------------------------------------
+# What an entity does to the player when their contact starts, per kind. Each
+# entity only gets one: hazards are flagged SPENT, pickups leave the road.
+def enter_hazard(state, ref):
+    state.entities.spend(ref)
+    hit(state, ref[0])
+
+# Collision detect life up to 5
+def enter_life(state, ref):
+    if state.player_life < max_life:
+        state.player_life += 1
+        if state.log: state.log.info('pickup', kind='life', lives=state.player_life, tick=state.tick_count)
+    state.entities.remove((ref,))  # Remove the collected life
+
+def enter_shield(state, ref):
+    state.shield_active = True
+    state.timers.start('shield', state.sim_time, shield_duration)
+    if state.log: state.log.info('pickup', kind='shield', seconds=shield_duration / 1000, tick=state.tick_count)
+    state.entities.remove((ref,))  # Remove the collected shield
+
+def enter_power_up(state, ref):
+    state.score += 50  # Award points
+    if state.log: state.log.info('pickup', kind='power_up', score=state.score, tick=state.tick_count)
+    state.entities.remove((ref,))  # Remove the collected power-up
+
+# CAR, HUMAN, BIRD, LIFE, SHIELD, POWER_UP
+ON_ENTER = (enter_hazard, enter_hazard, enter_hazard, enter_life, enter_shield, enter_power_up)
+
+#GAMEOVER RESTART ETC----------------------------------------------------------------------------------
+def game_over(state):
+    if state.score > state.high_score:
+        state.high_score = state.score
+        if state.log: state.log.info('high_score', score=state.high_score)
+    if state.log: state.log.warning('game_over', score=state.score, tick=state.tick_count)
+    state.over = True
+
+def reset_game(state):
+    # Reset player state
+    reset_player(state)
+    state.player_life = max_life
+    state.ducking = False
+    state.shield_active = False
+    state.timers.clear()
+
+    # Reset game environment
+    state.road_offset = 0.0
+    state.entities.clear()
+    state.spawner.reset(state.entities.travel)
+
+    # Reset game stats
+    state.score = 0
+    state.distance = 0
+    state.game_time = 0
+    state.over = False
+    state.spawned = [0] * len(KINDS)
+    state.lives_lost_to = [0] * len(KINDS)
+
+# Fresh road and scenery from `seed` (or a random one), the same seed always
+# gives the same spawn sequence whatever the renderer does. Ticks count from 0
+# again, which is where replays and recorders count them from.
+def new_game(state, seed=None):
+    state.rng.reseed(seed)
+    state.sim_time = 0.0
+    state.tick_count = 0
+    state.accumulator = 0.0
+    state.last_frame_time = None
+    init_scenery(state)
+    reset_game(state)
+
+def reset_player(state):
+    state.player_lane = 0; state.jumping = False; state.jump_height = 0.0
+
+#TIMED EFFECTS----------------------------------------------------------------------------------
+# What happens when an effect's timer runs out (see timers.py)
+def end_jump(state):
+    state.jumping = False; state.jump_height = 0.0
+
+def end_duck(state):
+    state.ducking = False
+
+def end_shield(state):
+    state.shield_active = False
+    if state.log: state.log.info('shield_gone', tick=state.tick_count)
+
+EXPIRE = {'jump': end_jump, 'duck': end_duck, 'shield': end_shield}
+
+#UPDATE----------------------------------------------------------------------------------
+# One fixed simulation tick
+def step(state):
+    if state.over:
+        return
+    state.sim_time += state.tick_ms
+    state.tick_count += 1
+    now = state.sim_time
+    road_speed = state.road_speed
+
+    # Update game time and score
+    state.game_time = now / 1000  # Convert to seconds
+    state.distance += road_speed * 10  # InternalTRACKING
+
+    # Add points based on time survived and obstacles passed
+    if state.tick_count % 30 == 0:  # Only increment score periodically to slow it down
+        state.score += 1  # Basic score increment just for surviving
+
+    # Timed effects that ran out this tick (jump landing, duck release, shield)
+    timers = state.timers
+    if timers.next_due() <= now:
+        for effect in timers.due(now):
+            expire = EXPIRE.get(effect)
+            if expire is not None:
+                expire(state)
+
+    # Jump
+    if state.jumping:
+        state.jump_height = jump_height_max * math.sin(math.pi * (now - state.jump_start) / jump_duration)
+
+    # Road animate
+    state.road_offset += road_speed
+
+    # Move everything on the road (positions follow from the travelled distance)
+    store = state.entities
+    store.advance(road_speed)
+
+    # Move trees along with the road
+    trees = state.trees
+    trees.advance(road_speed)
+    rng = state.rng.scenery
+    # If a tree goes out of view, move it back to the far end with random x position
+    for i in trees.out_of_view():
+        trees.replace(i, -100 + rng.uniform(-20, 20))
+        if trees.x[i] < 0:  # Left side
+            trees.x[i] = rng.uniform(-15, -8)
+        else:  # Right side
+            trees.x[i] = rng.uniform(8, 15)
+        trees.size[i] = rng.uniform(0.6, 1.2)  # Randomize size for variety
+#amount of spawning obstacles----------------------------------------------------------------------
+    # Only does anything when the scheduler has a spawn due
+    spawner = state.spawner
+    if spawner.next_due() <= store.travel:
+        rng = state.rng.spawns
+        for at, kind in spawner.due(store.travel):
+            if kind == SHIELD and store.count_kind(SHIELD) >= max_shields:  # limit to one shield
+                continue
+            height = rng.uniform(1.5, 2.5) if kind == BIRD else 0.0  # Birds fly at a height that requires ducking
+            store.spawn(kind, rng.randrange(3) - 1, height, at)
+            state.spawned[kind] += 1
+
+    check_collision(state)
+    # Points for each hazard that got past the player, after the collision check
+    # so a fast road can't carry something through the player and off in one tick
+    state.score += store.despawn_past()
+
+#INPUT----------------------------------------------------------------------------------
+# Gameplay keys only, returns False for keys the caller should handle (camera, quit)
+def keyboard(state, k):
+    if k=='a' and state.player_lane> -1:
+        state.player_lane-=1
+    elif k=='d' and state.player_lane< 1:
+        state.player_lane+=1
+    elif k==' ' and not state.jumping:
+        state.jumping=True; state.jump_start = state.sim_time
+        state.timers.start('jump', state.sim_time, jump_duration)
+    elif k=='s' and not state.jumping:  # 'S' key for ducking (only when not jumping)
+        state.ducking = True
+        state.duck_start = state.sim_time
+        state.timers.start('duck', state.sim_time, duck_duration)  # auto-release
+    elif k=='+' or k=='=':  # Speed up
+        state.road_speed += 0.1
+    elif k=='-' or k=='_':  # Slow down
+        state.road_speed = max(0.1, state.road_speed - 0.1)
+    elif k=='r':
+        reset_game(state)
+    elif k=='c':  # autopilot on/off, whoever drives the game runs it (see autopilot.py)
+        state.cheat_mode = not state.cheat_mode
+    else:
+        return k in (' ', 'a', 'd', 's')  # recognised but not allowed right now
+    return True
+
+#HEADLESS----------------------------------------------------------------------------------
+# Plays one game for up to `ticks` ticks with no window. `script` is a list of
+# (tick, key) pairs, `policy(state)` is called every tick and may return a key
+# (or None). Stops early on game over, returns the finished GameState.
+def run_headless(ticks, script=(), policy=None, seed=None, state=None):
+    if state is None:
+        state = GameState()
+    new_game(state, seed)
+    events = sorted(script, key=lambda e: e[0])
+    i = 0
+    for n in range(ticks):
+        while i < len(events) and events[i][0] <= n:
+            keyboard(state, events[i][1])
+            i += 1
+        if policy is not None:
+            key = policy(state)
+            if key:
+                keyboard(state, key)
+        step(state)
+        if state.over:
+            break
+    return state
+
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    # Back-to-back games until the tick budget is used up
+    done = games = 0
+    t0 = time.perf_counter()
+    while done < ticks:
+        done += run_headless(ticks - done, seed=seed + games).tick_count
+        games += 1
+    elapsed = time.perf_counter() - t0
+    print(f"{done} ticks, {games} games in {elapsed:.2f}s ({done / elapsed:,.0f} ticks/s)")
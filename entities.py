@@ -0,0 +1,285 @@
+from bisect import bisect_left, bisect_right
+import heapq
+
+import numpy as np
+# Array-backed entity storage for the engine. Everything on the road moves at the
+# same speed, so nothing stores a z that has to be rewritten every tick: each
+# entity keeps its `mark` (road travel at spawn minus spawn z) and its position
+# is `travel - mark`. Advancing the road is one add, despawning pops the front
+# of per-kind FIFO queues (spawn order is despawn order) and a per-lane index
+# sorted by mark answers collision queries.
+#KINDS----------------------------------------------------------------------------------
+CAR, HUMAN, BIRD, LIFE, SHIELD, POWER_UP = range(6)
+KINDS = range(6)
+KIND_NAMES = ('car', 'human', 'bird', 'life', 'shield', 'power_up')
+
+HAZARD = 1     # costs a life on contact
+PICKUP = 2     # collected on contact
+GONE = 4       # collected, skipped until it leaves the queue
+SPENT = 8      # had its contact with the player, harmless from then on
+KIND_FLAGS = (HAZARD, HAZARD, HAZARD, PICKUP, PICKUP, PICKUP)
+DESPAWN_POINTS = (5, 10, 8, 0, 0, 0)  # for getting past the player
+
+#HITBOXES----------------------------------------------------------------------------------
+# One box per kind for the collision test: half its depth along the road, its
+# bottom and top relative to the entity's height column (its altitude, 0 for
+# things on the ground) and which player moves can get clear of it. Depths
+# follow the models drawn in the renderer; ground traffic tops out at 1.0, the
+# jump height that has always cleared it.
+JUMP_CLEARS = 1  # jumping lifts the player's box, so it can go over
+DUCK_CLEARS = 2  # the duck pose lowers the player's box, so it can go under
+HITBOXES = (
+    # z half, bottom, top, cleared by
+    (0.5, 0.0, 1.0, JUMP_CLEARS),     # CAR, body 1.0 deep across the road
+    (0.3, 0.0, 1.0, JUMP_CLEARS),     # HUMAN, torso 0.4, arms 0.6
+    (0.6, -0.25, 0.25, DUCK_CLEARS),  # BIRD, body around its altitude
+    (0.75, 1.0, 2.5, 0),              # LIFE, heart floating at 2
+    (0.8, 1.2, 2.8, 0),               # SHIELD, disc and ring at 2
+    (0.75, 0.25, 1.75, 0),            # POWER_UP, 1.5 cube at 1
+)
+MAX_HITBOX_Z = max(box[0] for box in HITBOXES)
+
+SPAWN_Z = -100.0
+DESPAWN_Z = 20.0
+TREE_RESPAWN_Z = 30.0
+
+#LANE INDEX----------------------------------------------------------------------------------
+# Keeping each lane's entities sorted by mark turns "what is near the player in
+# this lane" into two bisects. Entries are (kind, pos) refs into the kind queues.
+class LaneIndex:
+    __slots__ = ('marks', 'refs')
+
+    def __init__(self):
+        self.marks = {}  # lane -> ascending marks (= descending z)
+        self.refs = {}   # lane -> (kind, pos), parallel to marks
+
+    def clear(self):
+        self.marks.clear()
+        self.refs.clear()
+
+    def add(self, lane, mark, ref):
+        marks = self.marks.setdefault(lane, [])
+        refs = self.refs.setdefault(lane, [])
+        if not marks or mark >= marks[-1]:  # the usual case, spawned behind everything else
+            marks.append(mark)
+            refs.append(ref)
+        else:
+            i = bisect_right(marks, mark)
+            marks.insert(i, mark)
+            refs.insert(i, ref)
+
+    def discard(self, lane, mark, ref):
+        marks = self.marks[lane]
+        refs = self.refs[lane]
+        i = bisect_left(marks, mark)
+        while refs[i] != ref:
+            i += 1
+        del marks[i], refs[i]
+
+    # Drops every entry with mark < mark_limit, they are at the front of each lane
+    def drop_below(self, mark_limit):
+        for lane, marks in self.marks.items():
+            k = bisect_left(marks, mark_limit)
+            if k:
+                del marks[:k]
+                del self.refs[lane][:k]
+
+    # (kind, pos) refs in `lane` with lo < mark < hi
+    def between(self, lane, lo, hi):
+        marks = self.marks.get(lane)
+        if not marks:
+            return ()
+        return self.refs[lane][bisect_right(marks, lo):bisect_left(marks, hi)]
+
+#KIND QUEUE----------------------------------------------------------------------------------
+# One FIFO of struct-of-arrays rows per kind. `pos` is a row's absolute position
+# in the queue since it was created, the array row is pos - base.
+COLUMNS = ('lane', 'mark', 'height', 'flags')
+
+class KindQueue:
+    __slots__ = COLUMNS + ('head', 'tail', 'base', 'live')
+
+    def __init__(self, capacity=32):
+        self.lane = np.zeros(capacity, dtype=np.int8)
+        self.mark = np.zeros(capacity, dtype=np.float64)
+        self.height = np.zeros(capacity, dtype=np.float64)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.head = 0   # first row still on the road
+        self.tail = 0   # one past the newest row
+        self.base = 0
+        self.live = 0   # rows between head and tail not flagged GONE
+
+    def clear(self):
+        self.base += self.tail
+        self.head = self.tail = self.live = 0
+
+    def make_room(self):
+        n = self.tail - self.head
+        if self.head >= n:
+            # Slide the live rows to the start, amortised against the pops that freed them
+            for name in COLUMNS:
+                col = getattr(self, name)
+                col[:n] = col[self.head:self.tail]
+        else:
+            capacity = len(self.mark) * 2
+            for name in COLUMNS:
+                old = getattr(self, name)
+                new = np.zeros(capacity, dtype=old.dtype)
+                new[:n] = old[self.head:self.tail]
+                setattr(self, name, new)
+        self.base += self.head
+        self.tail = n
+        self.head = 0
+
+    def push(self, lane, mark, height, flags):
+        if self.tail == len(self.mark):
+            self.make_room()
+        i = self.tail
+        self.lane[i] = lane
+        self.mark[i] = mark
+        self.height[i] = height
+        self.flags[i] = flags
+        self.tail = i + 1
+        self.live += 1
+        return self.base + i
+
+    # Pops everything with mark < mark_limit off the front, returns how many of
+    # them were still live
+    def pop_below(self, mark_limit):
+        head = self.head
+        if head == self.tail or self.mark[head] >= mark_limit:
+            return 0
+        end = head + int(self.mark[head:self.tail].searchsorted(mark_limit))
+        passed = (end - head) - int(np.count_nonzero(self.flags[head:end] & GONE))
+        self.head = end
+        self.live -= passed
+        return passed
+
+    def rows(self):
+        # Live row numbers, oldest (nearest the player) first
+        head, tail = self.head, self.tail
+        if self.live == tail - head:
+            return np.arange(head, tail)
+        return head + ((self.flags[head:tail] & GONE) == 0).nonzero()[0]
+
+#ROAD ENTITIES----------------------------------------------------------------------------------
+class EntityStore:
+    __slots__ = ('queues', 'index', 'travel')
+
+    def __init__(self):
+        self.queues = tuple(KindQueue() for _ in KINDS)
+        self.index = LaneIndex()
+        self.travel = 0.0   # total distance the road has moved
+
+    def __len__(self):
+        return sum(q.live for q in self.queues)
+
+    def clear(self):
+        for q in self.queues:
+            q.clear()
+        self.index.clear()
+
+    # Everything enters at the far end, which is what keeps each queue in mark
+    # order. `at` is the travel the spawn was due at (defaults to now), `height`
+    # is the altitude its hitbox sits at.
+    def spawn(self, kind, lane, height=0.0, at=None):
+        mark = (self.travel if at is None else at) - SPAWN_Z
+        pos = self.queues[kind].push(lane, mark, height, KIND_FLAGS[kind])
+        self.index.add(lane, mark, (kind, pos))
+        return pos
+
+    # The only per-tick write, every position follows from it
+    def advance(self, dz):
+        self.travel += dz
+
+    # Drops everything that went past z_limit, returns the points earned for them
+    def despawn_past(self, z_limit=DESPAWN_Z):
+        mark_limit = self.travel - z_limit
+        points = 0
+        dropped = False
+        for kind in KINDS:
+            q = self.queues[kind]
+            if q.head != q.tail and q.mark[q.head] < mark_limit:
+                points += q.pop_below(mark_limit) * DESPAWN_POINTS[kind]
+                dropped = True
+        if dropped:
+            self.index.drop_below(mark_limit)
+        return points
+
+    # Takes collected entities off the road, refs are (kind, pos) from near()
+    def remove(self, refs):
+        for ref in refs:
+            q, i = self.row(ref)
+            q.flags[i] |= GONE
+            q.live -= 1
+            self.index.discard(q.lane[i], q.mark[i], ref)
+
+    # Flags a hazard that hit the player, it stays on the road (and drawn) but
+    # collision skips it
+    def spend(self, ref):
+        q, i = self.row(ref)
+        q.flags[i] |= SPENT
+
+    def count_kind(self, kind):
+        return self.queues[kind].live
+
+    def row(self, ref):
+        kind, pos = ref
+        q = self.queues[kind]
+        return q, pos - q.base
+
+    # (lane, z, height) arrays for the live entities of one kind
+    def positions(self, kind):
+        q = self.queues[kind]
+        rows = q.rows()
+        return q.lane[rows], self.travel - q.mark[rows], q.height[rows]
+
+    # (kind, pos) refs in `lane` whose z is within `reach` of z_center, found
+    # through the lane index so the cost depends on what is near
+    def near(self, lane, z_center, reach):
+        centre = self.travel - z_center
+        return self.index.between(lane, centre - reach, centre + reach)
+
+    # Like near(), but for everything whose z went from z - dz to z this tick:
+    # refs whose path crossed the window at all
+    def swept(self, lane, z_center, reach, dz):
+        centre = self.travel - z_center
+        return self.index.between(lane, centre - reach - max(dz, 0.0), centre + reach)
+
+#SCENERY----------------------------------------------------------------------------------
+# Trees use the same marks but recycle to the far end instead of leaving, so they
+# sit in a heap by mark and only the ones going out of view are touched
+class Scenery:
+    __slots__ = ('x', 'mark', 'size', 'travel', 'heap')
+
+    def __init__(self, x=(), z=(), size=()):
+        self.x = np.array(x, dtype=np.float64)
+        self.mark = -np.array(z, dtype=np.float64)
+        self.size = np.array(size, dtype=np.float64)
+        self.travel = 0.0
+        self.heap = [(m, i) for i, m in enumerate(self.mark.tolist())]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.mark)
+
+    def z(self):
+        return self.travel - self.mark
+
+    def advance(self, dz):
+        self.travel += dz
+
+    # Pops the trees that went out of view, the caller picks their new x/size
+    # and puts them back with replace()
+    def out_of_view(self, z_limit=TREE_RESPAWN_Z):
+        heap = self.heap
+        mark_limit = self.travel - z_limit
+        gone = []
+        while heap and heap[0][0] < mark_limit:
+            gone.append(heapq.heappop(heap)[1])
+        return gone
+
+    def replace(self, i, z):
+        mark = self.travel - z
+        self.mark[i] = mark
+        heapq.heappush(self.heap, (mark, i))
@@ -0,0 +1,192 @@
+from bisect import bisect_right
+import sys
+import time
+
+import numpy as np
+
+import engine
+from batch import BatchWorld, ACTIONS, ACTION_KEYS
+from entities import BIRD, HAZARD, KIND_FLAGS
+from grid import GRID_NEAR, HORIZON, lane_grid, lane_grid_batch
+# Gym-style environments for training agents on SkateShift, with no gym
+# dependency: reset(seed) -> obs, step(action) -> (obs, reward, done, info).
+# SkateEnv wraps one GameState, VecSkateEnv runs N games on a BatchWorld and
+# restarts each one as soon as it is done. Actions are batch.ACTIONS, i.e. the
+# keyboard() moves: NOOP, LEFT 'a', RIGHT 'd', JUMP ' ', DUCK 's'.
+#
+# The reward is the score gained during the step minus life_penalty for every
+# life lost. `done` means the game is over (or hit max_ticks), the env never
+# goes through game_over()'s window path.
+#
+# Both envs must stay above MIN_STEPS_PER_SEC on one core; `python env.py`
+# measures their current steps/s against it.
+#
+# With grid=True the observation is {'features': ..., 'grid': ...}, the grid
+# being grid.py's lanes x z-buckets x kinds view of the road.
+MIN_STEPS_PER_SEC = {'SkateEnv': 40_000, 'VecSkateEnv': 400_000}
+#OBSERVATION----------------------------------------------------------------------------------
+# lane, jumping, jump height, ducking, lives, shield, then per lane (-1, 0, 1)
+# the distance to the nearest hazard not yet past the player (1 = none) and
+# whether it is a bird
+OBS_SIZE = 12
+HAZARD_KINDS = tuple(flags & HAZARD != 0 for flags in KIND_FLAGS)
+IS_HAZARD = np.array(HAZARD_KINDS)
+
+def observe(state):
+    obs = [state.player_lane, state.jumping, state.jump_height / engine.jump_height_max,
+           state.ducking, state.player_life / engine.max_life, state.shield_active]
+    store = state.entities
+    index = store.index
+    front = store.travel - GRID_NEAR  # marks above this are not past the player yet
+    for lane in (-1, 0, 1):
+        # The lane index is in mark order, nearest first
+        marks = index.marks.get(lane, ())
+        refs = index.refs.get(lane, ())
+        for i in range(bisect_right(marks, front), len(marks)):
+            kind = refs[i][0]
+            if HAZARD_KINDS[kind]:
+                obs += ((marks[i] - front) / HORIZON, kind == BIRD)
+                break
+        else:
+            obs += (1.0, False)
+    return np.array(obs, dtype=np.float32)
+
+def observe_batch(world):
+    n = world.n
+    obs = np.empty((n, OBS_SIZE), dtype=np.float32)
+    obs[:, 0] = world.lane
+    obs[:, 1] = world.jumping
+    obs[:, 2] = world.jump_height / engine.jump_height_max
+    obs[:, 3] = world.ducking
+    obs[:, 4] = world.life / engine.max_life
+    obs[:, 5] = world.shield_active
+    # Distance in marks, like observe(): free slots are +inf, non-hazards and
+    # things already past the player are pushed to +inf too
+    kind = world.kind
+    dist = world.mark - (world.travel - GRID_NEAR)[:, None]
+    dist[(dist <= 0) | ~IS_HAZARD.take(kind)] = np.inf
+    rows = np.arange(world.n)
+    for j, lane in enumerate((-1, 0, 1)):
+        in_lane = np.where(world.e_lane == lane, dist, np.inf)
+        slot = in_lane.argmin(axis=1)
+        nearest = in_lane[rows, slot]
+        none = np.isinf(nearest)
+        obs[:, 6 + 2 * j] = np.where(none, 1.0, nearest / HORIZON)
+        obs[:, 7 + 2 * j] = ~none & (kind[rows, slot] == BIRD)
+    return obs
+
+def observation(state, grid):
+    if grid:
+        return {'features': observe(state), 'grid': lane_grid(state)}
+    return observe(state)
+
+def observation_batch(world, grid):
+    if grid:
+        return {'features': observe_batch(world), 'grid': lane_grid_batch(world)}
+    return observe_batch(world)
+
+#SINGLE GAME----------------------------------------------------------------------------------
+class SkateEnv:
+    # frame_skip: ticks per step, the action is pressed on the first of them
+    def __init__(self, tick_rate=engine.default_tick_rate, frame_skip=1, max_ticks=None, life_penalty=50.0,
+                 grid=False):
+        self.state = engine.GameState(tick_rate=tick_rate)
+        self.grid = grid
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.life_penalty = life_penalty
+        self.action_space = ACTIONS
+
+    def reset(self, seed=None):
+        engine.new_game(self.state, seed)
+        return observation(self.state, self.grid)
+
+    def step(self, action):
+        state = self.state
+        score, life = state.score, state.player_life
+        key = ACTION_KEYS[action]
+        if key is not None:
+            engine.keyboard(state, key)
+        for _ in range(self.frame_skip):
+            engine.step(state)
+            if state.over:
+                break
+        lost = max(0, life - state.player_life)
+        reward = state.score - score - self.life_penalty * lost
+        done = state.over or (self.max_ticks is not None and state.tick_count >= self.max_ticks)
+        info = {'score': state.score, 'lives': state.player_life, 'ticks': state.tick_count}
+        return observation(state, self.grid), reward, done, info
+
+#VECTORIZED----------------------------------------------------------------------------------
+class VecSkateEnv:
+    def __init__(self, n, tick_rate=engine.default_tick_rate, frame_skip=1, max_ticks=None,
+                 life_penalty=50.0, grid=False, **world_options):
+        self.n = n
+        self.grid = grid
+        self.tick_rate = tick_rate
+        self.world_options = world_options
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+        self.life_penalty = life_penalty
+        self.action_space = ACTIONS
+        self.world = None
+
+    def reset(self, seed=None):
+        self.world = BatchWorld(self.n, seed=seed, tick_rate=self.tick_rate, **self.world_options)
+        return observation_batch(self.world, self.grid)
+
+    # Returns (obs, rewards, dones, info). Done games are restarted before the
+    # observation is taken, info['score'] holds the score each game ended with.
+    def step(self, actions):
+        world = self.world
+        score, life = world.score.copy(), world.life.copy()
+        world.step(actions)
+        for _ in range(self.frame_skip - 1):
+            world.step()
+        rewards = (world.score - score) - self.life_penalty * np.maximum(0, life - world.life)
+        dones = world.over.copy()
+        if self.max_ticks is not None:
+            dones |= world.tick_count >= self.max_ticks
+        info = {'score': world.score.copy(), 'ticks': world.tick_count.copy()}
+        if dones.any():
+            world.reset(dones)
+        return observation_batch(world, self.grid), rewards.astype(np.float32), dones, info
+
+#BENCHMARK----------------------------------------------------------------------------------
+# Steps per second with random actions, one core
+def benchmark(seconds=3.0, n=4096):
+    rng = np.random.default_rng(0)
+    results = {}
+
+    env = SkateEnv()
+    env.reset(seed=0)
+    actions = rng.integers(0, len(ACTIONS), 100_000)
+    steps = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for a in actions[:10_000]:
+            if env.step(a)[2]:
+                env.reset(seed=steps)
+        steps += 10_000
+        actions = np.roll(actions, 10_000)
+    results['SkateEnv'] = steps / (time.perf_counter() - t0)
+
+    vec = VecSkateEnv(n)
+    vec.reset(seed=0)
+    batches = rng.integers(0, len(ACTIONS), (64, n))
+    steps = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        for a in batches:
+            vec.step(a)
+        steps += len(batches) * n
+    results['VecSkateEnv'] = steps / (time.perf_counter() - t0)
+    return results
+
+if __name__ == "__main__":
+    ok = True
+    for name, rate in benchmark().items():
+        floor = MIN_STEPS_PER_SEC[name]
+        ok &= rate >= floor
+        print(f"{name:12} {rate:12,.0f} steps/s (minimum {floor:,}){'' if rate >= floor else '  TOO SLOW'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,133 @@
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+# Structured event log for the game window. Writing an event only appends a
+# tuple to a bounded deque (a ring buffer: when it is full the oldest event is
+# dropped), a daemon thread drains it to stdout or a file, so a
+# slow terminal or journald never stalls a frame. Events below the log's level
+# are dropped at the call, and the engine skips logging altogether when a
+# GameState has no log, which is what headless runs do.
+#
+#   log = EventLog(sys.stdout, level=INFO).start()
+#   log.info('hit', kind='car', lives=4)      # -> 12.345 INFO  hit kind=car lives=4
+#   log.close()                               # drains what is left
+#LEVELS----------------------------------------------------------------------------------
+DEBUG, INFO, WARNING = 10, 20, 30
+OFF = 100  # above every level
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'off': OFF}
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARN'}
+
+#LOG----------------------------------------------------------------------------------
+class EventLog:
+    __slots__ = ('sink', 'close_sink', 'level', 'json_lines', 'buf', 'seq', 'expected', 'flush_every',
+                 'thread', 'stopping', 't0')
+
+    # `sink` is any text file object, json_lines=True writes one JSON object per
+    # line instead of the `time LEVEL event key=value ...` text. close_sink=True
+    # hands the sink over, close() closes it.
+    def __init__(self, sink=sys.stdout, level=INFO, capacity=4096, json_lines=False, flush_every=0.05,
+                 close_sink=False):
+        self.sink = sink
+        self.close_sink = close_sink
+        self.level = level
+        self.json_lines = json_lines
+        self.buf = deque(maxlen=capacity)  # (seq, seconds since t0, level, event, fields)
+        # Events are numbered as they are written and the drain counts the gaps,
+        # so each side only touches its own counter and nothing takes a lock
+        self.seq = itertools.count()
+        self.expected = 0                  # seq of the next event the drain should see
+        self.flush_every = flush_every     # seconds between drains
+        self.thread = None
+        self.stopping = threading.Event()
+        self.t0 = time.perf_counter()
+
+    # Appending to a deque and next() on a count are atomic, so the game thread
+    # never takes a lock
+    def write(self, level, event, fields):
+        if level < self.level:
+            return
+        self.buf.append((next(self.seq), time.perf_counter() - self.t0, level, event, fields))
+
+    def debug(self, event, **fields):
+        if DEBUG >= self.level:
+            self.write(DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        if INFO >= self.level:
+            self.write(INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self.write(WARNING, event, fields)
+
+    #DRAINING----------------------------------------------------------------------------------
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='eventlog', daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopping.wait(self.flush_every):
+            self.drain()
+        self.drain()
+
+    # Writes out everything logged so far, returns how many events that was
+    def drain(self):
+        buf = self.buf
+        lines = []
+        while buf:
+            seq, t, level, event, fields = buf.popleft()
+            if seq > self.expected:  # the ring buffer overwrote the ones in between
+                lines.append(self.format(t, WARNING, 'log_overflow', {'dropped': seq - self.expected}))
+            self.expected = seq + 1
+            lines.append(self.format(t, level, event, fields))
+        if lines:
+            self.sink.write('\n'.join(lines) + '\n')
+            self.sink.flush()
+        return len(lines)
+
+    def format(self, t, level, event, fields):
+        if self.json_lines:
+            return json.dumps({'t': round(t, 4), 'level': LEVEL_NAMES[level], 'event': event, **fields})
+        return f"{t:9.3f} {LEVEL_NAMES[level]:5} {event}" + ''.join(f" {k}={v}" for k, v in fields.items())
+
+    # Stops the thread after a last drain (or drains here if it never started)
+    def close(self):
+        if self.thread is None:
+            self.drain()
+        else:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+        if self.close_sink:
+            self.sink.close()
+
+# The window's log, set up from the environment: SKATESHIFT_LOG picks the level
+# (debug, info, warning or off, default info) and SKATESHIFT_LOG_FILE sends JSON
+# lines to a file instead of text to stdout. Returns None for off.
+def from_env(environ=os.environ):
+    level = LEVELS.get(environ.get('SKATESHIFT_LOG', 'info').lower(), INFO)
+    if level >= OFF:
+        return None
+    path = environ.get('SKATESHIFT_LOG_FILE')
+    if path:
+        return EventLog(open(path, 'a', buffering=1 << 16), level=level, json_lines=True, close_sink=True).start()
+    return EventLog(sys.stdout, level=level).start()
+
+if __name__ == "__main__":
+    # Cost of a logged and of a filtered-out event on the calling thread
+    log = EventLog(open(os.devnull, 'w'), level=INFO, capacity=1 << 20, close_sink=True).start()
+    n = 200_000
+    t0 = time.perf_counter()
+    for i in range(n):
+        log.info('hit', kind='car', lives=i)
+    logged = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for i in range(n):
+        log.debug('camera', key=i)
+    filtered = (time.perf_counter() - t0) / n
+    log.close()
+    print(f"logged {logged * 1e9:.0f}ns per event, filtered out {filtered * 1e9:.0f}ns per event")
@@ -0,0 +1,108 @@
+from OpenGL.GL import *
+from OpenGL.GLU import *
+# Owner of every GL object the renderer creates: display lists, buffers,
+# vertex arrays, textures, framebuffers, shader programs and GLU quadrics. Everything is
+# created through here once and handed out again, so nothing is allocated per
+# frame, counts() says what is alive at any point and release() frees it all
+# while the context is still current (window close / 'q').
+#
+#   resources = GLResources()
+#   gluCylinder(resources.quadric(), 0.2, 0.2, 0.2, 12, 1)
+#   gl_list, = resources.lists()
+#   resources.counts()   # -> {'list': 1, 'quadric': 1, ...}
+#DELETERS----------------------------------------------------------------------------------
+def delete_lists(ids):
+    for gl_list in ids:
+        glDeleteLists(gl_list, 1)
+
+def delete_programs(ids):
+    for program in ids:
+        glDeleteProgram(program)
+
+def delete_buffers(ids):
+    glDeleteBuffers(len(ids), ids)
+
+def delete_vertex_arrays(ids):
+    glDeleteVertexArrays(len(ids), ids)
+
+def delete_textures(ids):
+    glDeleteTextures(len(ids), ids)
+
+def delete_framebuffers(ids):
+    glDeleteFramebuffers(len(ids), ids)
+
+DELETERS = {
+    'list': delete_lists,
+    'buffer': delete_buffers,
+    'vertex_array': delete_vertex_arrays,
+    'texture': delete_textures,
+    'framebuffer': delete_framebuffers,
+    'program': delete_programs,
+}
+
+# glGen* hand back a bare id for one object and an array for more
+def id_list(ids, n):
+    return [int(ids)] if n == 1 else [int(i) for i in ids]
+
+#RESOURCES----------------------------------------------------------------------------------
+class GLResources:
+    __slots__ = ('live', 'quadrics')
+
+    def __init__(self):
+        self.live = {kind: [] for kind in DELETERS}  # kind -> ids, in creation order
+        self.quadrics = {}                            # key -> GLU quadric
+
+    # The quadric for `key`, made on first use. Quadrics only carry draw style,
+    # so every model with the default style shares one.
+    def quadric(self, key='default'):
+        quadric = self.quadrics.get(key)
+        if quadric is None:
+            quadric = self.quadrics[key] = gluNewQuadric()
+        return quadric
+
+    def lists(self, n=1):
+        base = glGenLists(n)
+        return self.track('list', range(base, base + n))
+
+    def buffers(self, n=1):
+        return self.track('buffer', id_list(glGenBuffers(n), n))
+
+    def vertex_arrays(self, n=1):
+        return self.track('vertex_array', id_list(glGenVertexArrays(n), n))
+
+    def textures(self, n=1):
+        return self.track('texture', id_list(glGenTextures(n), n))
+
+    def framebuffers(self, n=1):
+        return self.track('framebuffer', id_list(glGenFramebuffers(n), n))
+
+    def program(self):
+        return self.track('program', [glCreateProgram()])[0]
+
+    def track(self, kind, ids):
+        ids = list(ids)
+        self.live[kind].extend(ids)
+        return ids
+
+    # Deletes some objects before shutdown, e.g. a model being recompiled
+    def free(self, kind, ids):
+        ids = [i for i in ids if i in self.live[kind]]
+        if ids:
+            DELETERS[kind](ids)
+            self.live[kind] = [i for i in self.live[kind] if i not in ids]
+
+    # Live objects per kind
+    def counts(self):
+        counts = {kind: len(ids) for kind, ids in self.live.items()}
+        counts['quadric'] = len(self.quadrics)
+        return counts
+
+    # Deletes everything, the context has to be current
+    def release(self):
+        for kind, ids in self.live.items():
+            if ids:
+                DELETERS[kind](ids)
+                ids.clear()
+        for quadric in self.quadrics.values():
+            gluDeleteQuadric(quadric)
+        self.quadrics.clear()
@@ -0,0 +1,169 @@
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+from OpenGL.GLUT import *
+# Texture-atlas text for the HUD. bake() draws every printable character of a
+# GLUT bitmap font once straight into a texture, through a framebuffer object,
+# and keeps each glyph's cell and advance, so text looks exactly like
+# glutBitmapCharacter's. A string then becomes one batch of textured
+# quads (one glDrawArrays) instead of a GL call per character per frame.
+#
+# Labels caches those meshes per HUD slot together with the values they were
+# formatted from: while the score (or the shield countdown, at the precision
+# shown) stays the same nothing is formatted or rebuilt. Where bake() can't
+# run (no framebuffer objects) BitmapText draws through glutBitmapCharacter
+# behind the same interface. Needs a GL context.
+#
+#   labels = Labels(bake(GLUT_BITMAP_HELVETICA_18, resources))
+#   labels.draw('score', 30, 570, "Score: {}", state.score)   # in hud.begin()/end()
+#ATLAS----------------------------------------------------------------------------------
+FIRST, LAST = 32, 126  # printable ASCII, anything else draws as '?'
+COLUMNS = 16
+PAD = 4                # room around each glyph for what sticks out of its advance
+LINE_HEIGHT = 22       # Helvetica 18's, for GLUTs without glutBitmapHeight (freeglut only)
+
+class GlyphAtlas:
+    __slots__ = ('texture', 'cell_w', 'cell_h', 'descent', 'width', 'height', 'advances')
+
+    def __init__(self, texture, cell_w, cell_h, descent, advances):
+        self.texture = texture
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.descent = descent    # cell rows below the baseline
+        self.width = COLUMNS * cell_w
+        self.height = -(-len(advances) // COLUMNS) * cell_h
+        self.advances = advances  # pixels, per character from FIRST
+
+    # (vertices, texcoords) float32 arrays of quads for `string`, baseline at (x, y)
+    def mesh(self, string, x, y):
+        codes = np.frombuffer(string.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64)
+        codes[(codes < FIRST) | (codes > LAST)] = ord('?')
+        glyph = codes - FIRST
+        advances = np.asarray(self.advances)[glyph]
+        left = x - PAD + np.concatenate(([0], np.cumsum(advances)[:-1]))
+        bottom = y - self.descent
+        cw, ch = self.cell_w, self.cell_h
+        corners = np.array(((0, 0), (1, 0), (1, 1), (0, 1)), dtype=np.float32)
+        vertices = np.empty((len(codes), 4, 2), dtype=np.float32)
+        vertices[:, :, 0] = left[:, None] + corners[:, 0] * cw
+        vertices[:, :, 1] = bottom + corners[:, 1] * ch
+        texcoords = np.empty((len(codes), 4, 2), dtype=np.float32)
+        texcoords[:, :, 0] = ((glyph % COLUMNS)[:, None] + corners[:, 0]) * (cw / self.width)
+        texcoords[:, :, 1] = ((glyph // COLUMNS)[:, None] + corners[:, 1]) * (ch / self.height)
+        return vertices.reshape(-1, 2), texcoords.reshape(-1, 2)
+
+    def draw(self, mesh, colour):
+        vertices, texcoords = mesh
+        if not len(vertices):
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT)
+        glColor3f(*colour)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glEnable(GL_ALPHA_TEST)  # glyph pixels are on or off, like the bitmaps
+        glAlphaFunc(GL_GREATER, 0.5)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glTexCoordPointer(2, GL_FLOAT, 0, texcoords)
+        glDrawArrays(GL_QUADS, 0, len(vertices))
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPopAttrib()
+
+# Builds the atlas for a GLUT bitmap font by drawing it into the atlas texture
+# itself, white on transparent. Offscreen, so it works before the window is
+# mapped. Raises RuntimeError without framebuffer objects (GL 3.0 or
+# ARB_framebuffer_object), nothing is left allocated then.
+def bake(font, resources):
+    if not bool(glGenFramebuffers):
+        raise RuntimeError('no framebuffer objects')
+    advances = [glutBitmapWidth(font, code) for code in range(FIRST, LAST + 1)]
+    line = glutBitmapHeight(font) if bool(glutBitmapHeight) else LINE_HEIGHT
+    descent = line // 3 + PAD
+    cell_w = max(advances) + 2 * PAD
+    cell_h = line + descent + PAD
+    rows = -(-len(advances) // COLUMNS)
+    width, height = COLUMNS * cell_w, rows * cell_h
+
+    texture, = resources.textures()
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    window = int(glGetIntegerv(GL_FRAMEBUFFER_BINDING))
+    framebuffer, = resources.framebuffers()
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+    glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, texture, 0)
+    if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+        glBindFramebuffer(GL_FRAMEBUFFER, window)
+        resources.free('framebuffer', [framebuffer])
+        resources.free('texture', [texture])
+        raise RuntimeError('cannot draw into the glyph atlas texture')
+
+    glPushAttrib(GL_ENABLE_BIT | GL_CURRENT_BIT | GL_COLOR_BUFFER_BIT | GL_VIEWPORT_BIT)
+    glDisable(GL_DEPTH_TEST)
+    glViewport(0, 0, width, height)
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, width, 0, height)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+    glClearColor(0, 0, 0, 0)
+    glClear(GL_COLOR_BUFFER_BIT)
+    glColor3f(1, 1, 1)
+    for i in range(len(advances)):
+        glRasterPos2i(i % COLUMNS * cell_w + PAD, i // COLUMNS * cell_h + descent)
+        glutBitmapCharacter(font, FIRST + i)
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPopAttrib()
+
+    glBindFramebuffer(GL_FRAMEBUFFER, window)
+    resources.free('framebuffer', [framebuffer])  # the texture keeps the pixels
+    return GlyphAtlas(texture, cell_w, cell_h, descent, advances)
+
+# The fallback: a "mesh" is just the string and where it goes, drawn a
+# character at a time every frame like the renderer used to
+class BitmapText:
+    __slots__ = ('font',)
+
+    def __init__(self, font):
+        self.font = font
+
+    def mesh(self, string, x, y):
+        return string, x, y
+
+    def draw(self, mesh, colour):
+        string, x, y = mesh
+        glPushAttrib(GL_CURRENT_BIT)
+        glColor3f(*colour)
+        glRasterPos2f(x, y)
+        for char in string:
+            glutBitmapCharacter(self.font, ord(char))
+        glPopAttrib()
+
+#LABELS----------------------------------------------------------------------------------
+WHITE = (1.0, 1.0, 1.0)
+
+class Labels:
+    __slots__ = ('atlas', 'meshes')
+
+    def __init__(self, atlas):
+        self.atlas = atlas  # GlyphAtlas or BitmapText
+        self.meshes = {}  # slot -> ((x, y, fmt, values), mesh)
+
+    # Draws fmt.format(*values) (fmt itself without values) at (x, y), reusing
+    # the slot's mesh while its position, format and values are unchanged
+    def draw(self, slot, x, y, fmt, *values, colour=WHITE):
+        key = (x, y, fmt, values)
+        cached = self.meshes.get(slot)
+        if cached is None or cached[0] != key:
+            cached = self.meshes[slot] = (key, self.atlas.mesh(fmt.format(*values) if values else fmt, x, y))
+        self.atlas.draw(cached[1], colour)
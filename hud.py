@@ -0,0 +1,123 @@
+import math
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import *
+# The 2D overlay drawn over the road: life hearts, the shield icon and text
+# (glyphs.Labels). begin() sets up the 800x600 screen projection once for the
+# whole overlay and end() puts the 3D one back. The icon shapes are computed
+# once at import as triangle and line vertex arrays (the same fans the old
+# immediate-mode code drew), and each lives/shield combination is laid out once
+# into a single array, so all the icons are two glDrawArrays calls.
+#
+#   hud.begin()
+#   icons.draw(lives=3, shield=True)
+#   labels.draw('score', 30, 570, "Score: {}", 120)
+#   hud.end()
+#SCREEN----------------------------------------------------------------------------------
+WIDTH, HEIGHT = 800, 600
+
+def begin():
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, WIDTH, 0, HEIGHT)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+def end():
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+
+#SHAPES----------------------------------------------------------------------------------
+# A triangle fan as separate triangles, so several shapes share one draw
+def fan(centre, rim):
+    rim = np.asarray(rim, dtype=np.float32)
+    tris = np.empty((len(rim) - 1, 3, 2), dtype=np.float32)
+    tris[:, 0] = centre
+    tris[:, 1] = rim[:-1]
+    tris[:, 2] = rim[1:]
+    return tris.reshape(-1, 2)
+
+def circle(radius, segments, points):
+    angles = np.arange(points) * (2.0 * math.pi / segments)
+    return np.stack((radius * np.cos(angles), radius * np.sin(angles)), axis=1)
+
+def heart(size=8):
+    # Fan around a centre just below the anchor, over both lobes' arcs
+    cy = -5
+    left = np.radians(np.arange(181))
+    right = np.radians(180 - np.arange(181))
+    rim = np.concatenate((
+        np.stack((-size + 2 * size * np.cos(left), cy + 2 * size + 1.8 * size * np.sin(left)), axis=1),
+        np.stack((size + 2 * size * np.cos(right), cy + 2 * size + 1.8 * size * np.sin(right)), axis=1)))
+    return fan((0, cy), rim)
+
+# A line loop as separate segments
+def segments(points):
+    return np.stack((points, np.roll(points, -1, axis=0)), axis=1).reshape(-1, 2).astype(np.float32)
+
+def colours(colour, n):
+    return np.tile(np.array(colour, dtype=np.float32), (n, 1))
+
+RED = (1.0, 0.0, 0.0)
+SHIELD_BLUE = (0.0, 0.4, 0.8)
+SHIELD_GOLD = (0.8, 0.8, 0.1)
+SHIELD_RED = (0.8, 0.1, 0.1)
+
+HEART = heart()
+HEART_COLOURS = colours(RED, len(HEART))
+SHIELD_DISC = np.concatenate((fan((0, 0), circle(20, 16, 17)), fan((0, 0), circle(7, 16, 17))))
+SHIELD_DISC_COLOURS = np.concatenate((colours(SHIELD_BLUE, 16 * 3), colours(SHIELD_RED, 16 * 3)))
+SHIELD_BORDER = segments(circle(20, 16, 16))
+SHIELD_BORDER_COLOURS = colours(SHIELD_GOLD, len(SHIELD_BORDER))
+
+#ICONS----------------------------------------------------------------------------------
+HEARTS_AT = (30, 30)      # first heart, the rest follow to the right
+HEART_SPACING = 50
+SHIELD_ICON_AT = (700, 30)
+
+class Icons:
+    __slots__ = ('layouts',)
+
+    def __init__(self):
+        self.layouts = {}  # (lives, shield) -> (triangles, colours, lines, line colours)
+
+    def layout(self, lives, shield):
+        key = (lives, shield)
+        layout = self.layouts.get(key)
+        if layout is None:
+            x, y = HEARTS_AT
+            tris = [HEART + (x + i * HEART_SPACING, y) for i in range(lives)]
+            tri_colours = [HEART_COLOURS] * lives
+            lines, line_colours = [], []
+            if shield:
+                tris.append(SHIELD_DISC + SHIELD_ICON_AT)
+                tri_colours.append(SHIELD_DISC_COLOURS)
+                lines.append(SHIELD_BORDER + SHIELD_ICON_AT)
+                line_colours.append(SHIELD_BORDER_COLOURS)
+            layout = self.layouts[key] = tuple(
+                np.concatenate(parts, dtype=np.float32) if parts else np.empty((0, 2), dtype=np.float32)
+                for parts in (tris, tri_colours, lines, line_colours))
+        return layout
+
+    # Every heart and the shield icon, inside begin()/end()
+    def draw(self, lives, shield):
+        tris, tri_colours, lines, line_colours = self.layout(lives, shield)
+        if not len(tris):
+            return
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, tris)
+        glColorPointer(3, GL_FLOAT, 0, tri_colours)
+        glDrawArrays(GL_TRIANGLES, 0, len(tris))
+        if len(lines):
+            glLineWidth(2.0)
+            glVertexPointer(2, GL_FLOAT, 0, lines)
+            glColorPointer(3, GL_FLOAT, 0, line_colours)
+            glDrawArrays(GL_LINES, 0, len(lines))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
@@ -0,0 +1,182 @@
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+# Instanced drawing for the models the road is full of (trees, cars,
+# pedestrians, birds, pickups). Each model's triangles are captured once from
+# its models.ModelCache function through GL feedback mode, so the meshes are
+# exactly what the display lists draw, and go into a static vertex buffer.
+# Per frame every kind is one buffer upload of its instance rows and one
+# glDrawArraysInstanced, whatever the number of entities: no Python loop per
+# tree or car.
+#
+# An instance row is x, y, z, scale, tint r, g, b, a, spin: the model is spun
+# `spin` degrees about its z axis, scaled, then moved to (x, y, z). Vertices
+# captured while the current colour had alpha 0 take the tint (pedestrian
+# clothes), the rest keep their own colour. No lighting, like the rest of the
+# renderer. Needs GL 3.3 (or the instancing and vertex array extensions),
+# see supported().
+#
+#   instancer = Instancer(model_cache, ('tree', 'car'))   # with a GL context
+#   instancer.draw('tree', instances(trees.x, 0.0, trees.z(), trees.size))
+#
+# Buffers, vertex arrays and the program come from the model cache's
+# glresources.GLResources.
+#INSTANCES----------------------------------------------------------------------------------
+ROW = 9  # floats per instance row
+WHITE = (1.0, 1.0, 1.0, 1.0)
+
+# (n, ROW) float32 instance rows, every argument is a scalar or a length-n array
+def instances(x, y, z, scale=1.0, tint=WHITE, spin=0.0):
+    x = np.asarray(x, dtype=np.float32)
+    rows = np.empty((len(x), ROW), dtype=np.float32)
+    rows[:, 0] = x
+    rows[:, 1] = y
+    rows[:, 2] = z
+    rows[:, 3] = scale
+    rows[:, 4:8] = tint
+    rows[:, 8] = spin
+    return rows
+
+#SHADER----------------------------------------------------------------------------------
+VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute vec4 color;
+attribute vec4 place;   // x, y, z, scale
+attribute vec4 tint;
+attribute float spin;   // degrees about z
+varying vec4 v_color;
+void main() {
+    float a = radians(spin);
+    float c = cos(a), s = sin(a);
+    vec3 p = vec3(c * position.x - s * position.y, s * position.x + c * position.y, position.z);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(p * place.w + place.xyz, 1.0);
+    v_color = color.a < 0.5 ? tint : color;
+}
+"""
+FRAGMENT_SHADER = """
+#version 120
+varying vec4 v_color;
+void main() {
+    gl_FragColor = v_color;
+}
+"""
+POSITION, COLOR, PLACE, TINT, SPIN = range(5)  # attribute locations
+VERTEX = 7  # floats per mesh vertex: x, y, z, r, g, b, a
+
+def supported():
+    return all(map(bool, (glDrawArraysInstanced, glVertexAttribDivisor, glGenVertexArrays, glCreateShader)))
+
+# The linked program, or RuntimeError with the driver's log if GLSL 1.20 doesn't
+# compile or link here (nothing is left allocated then)
+def compile_program(resources):
+    program = resources.program()
+    for kind, source in ((GL_VERTEX_SHADER, VERTEX_SHADER), (GL_FRAGMENT_SHADER, FRAGMENT_SHADER)):
+        shader = glCreateShader(kind)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            error = glGetShaderInfoLog(shader)
+            glDeleteShader(shader)
+            resources.free('program', [program])
+            raise RuntimeError(error.decode())
+        glAttachShader(program, shader)
+        glDeleteShader(shader)  # goes when the program does
+    for location, name in enumerate(('position', 'color', 'place', 'tint', 'spin')):
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        error = glGetProgramInfoLog(program)
+        resources.free('program', [program])
+        raise RuntimeError(error.decode())
+    return program
+
+#MESH CAPTURE----------------------------------------------------------------------------------
+CAPTURE_BOX = 10.0       # models have to fit in +-this around their origin
+CAPTURE_VIEWPORT = 1024
+CAPTURE_FLOATS = 1 << 21
+
+# Runs a model function in feedback mode and returns its triangles as (n, VERTEX)
+# float32 rows in model space. Lines and points are dropped.
+def capture(build):
+    viewport = glGetIntegerv(GL_VIEWPORT)
+    glViewport(0, 0, CAPTURE_VIEWPORT, CAPTURE_VIEWPORT)
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    b = CAPTURE_BOX
+    glOrtho(-b, b, -b, b, -b, b)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+    glPushAttrib(GL_CURRENT_BIT | GL_ENABLE_BIT | GL_LINE_BIT)
+    glFeedbackBuffer(CAPTURE_FLOATS, GL_3D_COLOR)
+    glRenderMode(GL_FEEDBACK)
+    glColor4f(1.0, 1.0, 1.0, 0.0)  # "no colour of its own", takes the tint
+    build()
+    records = glRenderMode(GL_RENDER)
+    glPopAttrib()
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glViewport(*viewport)
+
+    rows = []
+    for record in records:
+        if record[0] != GL_POLYGON_TOKEN:
+            continue
+        corners = record[1:]
+        for i in range(1, len(corners) - 1):  # fan
+            for v in (corners[0], corners[i], corners[i + 1]):
+                rows.append((*v.vertex[:3], *v.color[:4]))
+    mesh = np.array(rows, dtype=np.float32).reshape(-1, VERTEX)
+    # Window coordinates back to model space
+    mesh[:, 0:2] = (mesh[:, 0:2] * (2.0 / CAPTURE_VIEWPORT) - 1.0) * b
+    mesh[:, 2] = (1.0 - 2.0 * mesh[:, 2]) * b
+    return mesh
+
+#INSTANCER----------------------------------------------------------------------------------
+# Each mesh gets a vertex array object with its attribute layout recorded once
+# and its own instance buffer, so a draw is a bind, an upload and the draw call.
+# Raises RuntimeError when the shaders don't build, see compile_program().
+class Instancer:
+    __slots__ = ('program', 'meshes')
+
+    def __init__(self, model_cache, names):
+        resources = model_cache.resources
+        self.program = compile_program(resources)
+        self.meshes = {}  # name -> (vertex array, mesh buffer, instance buffer, vertex count)
+        for name in names:
+            mesh = capture(model_cache.builders[name])
+            vao, = resources.vertex_arrays()
+            glBindVertexArray(vao)
+            mesh_buffer, instance_buffer = resources.buffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, mesh_buffer)
+            glBufferData(GL_ARRAY_BUFFER, mesh.nbytes, mesh, GL_STATIC_DRAW)
+            for location, size, offset in ((POSITION, 3, 0), (COLOR, 4, 12)):
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, VERTEX * 4, ctypes.c_void_p(offset))
+            glBindBuffer(GL_ARRAY_BUFFER, instance_buffer)
+            for location, size, offset in ((PLACE, 4, 0), (TINT, 4, 16), (SPIN, 1, 32)):
+                glEnableVertexAttribArray(location)
+                glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, ROW * 4, ctypes.c_void_p(offset))
+                glVertexAttribDivisor(location, 1)
+            self.meshes[name] = (vao, mesh_buffer, instance_buffer, len(mesh))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    # One instanced draw of model `name` for every row of `rows` (see instances())
+    def draw(self, name, rows):
+        if not len(rows):
+            return
+        vao, mesh_buffer, instance_buffer, count = self.meshes[name]
+        glUseProgram(self.program)
+        glBindVertexArray(vao)
+        glBindBuffer(GL_ARRAY_BUFFER, instance_buffer)
+        glBufferData(GL_ARRAY_BUFFER, rows.nbytes, rows, GL_STREAM_DRAW)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, count, len(rows))
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
@@ -0,0 +1,51 @@
+from OpenGL.GL import *
+# Compiled models for the renderer. Each model is a function that issues the
+# GL calls for one instance at the origin; the cache records it once into a
+# display list (at init, or the first time it is drawn) and from then on
+# drawing it is a single glCallList after the caller's translate. The GL
+# context has to exist before anything is compiled, so nothing here runs at
+# import time. The lists come from (and are freed through) a
+# glresources.GLResources.
+#
+#   cache = ModelCache(resources)
+#   cache.add('car', car_model)
+#   glTranslatef(x, 0.25, z); cache.draw('car')
+#MODEL CACHE----------------------------------------------------------------------------------
+class ModelCache:
+    __slots__ = ('resources', 'builders', 'lists')
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.builders = {}  # name -> function issuing the model's GL calls
+        self.lists = {}     # name -> compiled display list
+
+    # Registers a model, usable as a decorator: @cache.model('car')
+    def add(self, name, build):
+        self.builders[name] = build
+        gl_list = self.lists.pop(name, None)
+        if gl_list is not None:
+            self.resources.free('list', [gl_list])
+
+    def model(self, name):
+        def register(build):
+            self.add(name, build)
+            return build
+        return register
+
+    def compile(self, name):
+        gl_list, = self.resources.lists()
+        glNewList(gl_list, GL_COMPILE)
+        self.builders[name]()
+        glEndList()
+        self.lists[name] = gl_list
+        return gl_list
+
+    # Compiles everything registered, so no frame pays for it later
+    def compile_all(self):
+        for name in self.builders:
+            if name not in self.lists:
+                self.compile(name)
+
+    def draw(self, name):
+        gl_list = self.lists.get(name)
+        glCallList(gl_list if gl_list is not None else self.compile(name))
@@ -0,0 +1,243 @@
+from bisect import bisect_right
+import struct
+import sys
+import time
+
+import engine
+# Input replays. A run is fully determined by its seed, tick rate and the keys
+# pressed at each tick, so that is all a replay stores:
+#
+#   header     b"SKR" version, varint zigzag(seed), varint tick_rate
+#   events     varint ticks-since-last-event, one key byte
+#   end        varint ticks-since-last-event, END byte
+#   keyframes  engine.snapshot() blobs, back to back
+#   index      varint count, then per keyframe varint tick, varint number of
+#              events before it, varint offset, varint length
+#   footer     uint32 offset of the index
+#
+# Keyboard keys are stored as their ASCII code, GLUT special keys (arrows,
+# camera only) as SPECIAL | code. A few minutes of play is a few hundred bytes
+# of input plus a keyframe (~12KB) every keyframe_seconds, which is what lets
+# seek() jump into a long run without replaying it from tick 0.
+# Version 1 files (no keyframes, no index) still load.
+#FORMAT----------------------------------------------------------------------------------
+MAGIC = b"SKR"
+VERSION = 2
+END = 0x00
+SPECIAL = 0x80
+FOOTER = struct.Struct('<I')
+keyframe_seconds = 120
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def read_varint(data, i):
+    n = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+def zigzag(n):
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+def unzigzag(n):
+    return n >> 1 if not n & 1 else -(n >> 1) - 1
+
+#RECORDING----------------------------------------------------------------------------------
+class Recorder:
+    __slots__ = ('seed', 'tick_rate', 'buf', 'last_tick', 'events',
+                 'keyframes', 'keyframe_every', 'next_keyframe')
+
+    # Start one right after engine.new_game(), ticks are counted from there
+    def __init__(self, seed, tick_rate=engine.default_tick_rate, keyframe_every=None):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.buf = bytearray(MAGIC)
+        self.buf.append(VERSION)
+        write_varint(self.buf, zigzag(seed))
+        write_varint(self.buf, tick_rate)
+        self.last_tick = 0
+        self.events = 0
+        self.keyframes = []  # (tick, events before it, snapshot)
+        self.keyframe_every = keyframe_every or keyframe_seconds * tick_rate
+        self.next_keyframe = self.keyframe_every
+
+    def event(self, tick, code):
+        write_varint(self.buf, tick - self.last_tick)
+        self.buf.append(code)
+        self.last_tick = tick
+        self.events += 1
+
+    # Call before every tick (engine.advance's before_tick), takes a keyframe
+    # when one is due
+    def tick(self, state):
+        if state.tick_count >= self.next_keyframe:
+            self.keyframes.append((state.tick_count, self.events, engine.snapshot(state)))
+            self.next_keyframe = state.tick_count + self.keyframe_every
+
+    # `tick` is the tick count at the moment of the press, the key takes effect
+    # before that tick is simulated
+    def key(self, tick, k):
+        code = ord(k)
+        if 0 < code < SPECIAL:
+            self.event(tick, code)
+
+    def special(self, tick, key):
+        self.event(tick, SPECIAL | int(key))
+
+    def finish(self, tick):
+        out = bytearray(self.buf)
+        write_varint(out, tick - self.last_tick)
+        out.append(END)
+        index = bytearray()
+        write_varint(index, len(self.keyframes))
+        for kf_tick, events, blob in self.keyframes:
+            for n in (kf_tick, events, len(out), len(blob)):
+                write_varint(index, n)
+            out += blob
+        index_offset = len(out)
+        out += index
+        out += FOOTER.pack(index_offset)
+        return bytes(out)
+
+    def save(self, path, tick):
+        with open(path, 'wb') as f:
+            f.write(self.finish(tick))
+
+#PLAYBACK----------------------------------------------------------------------------------
+class Replay:
+    __slots__ = ('seed', 'tick_rate', 'events', 'end_tick', 'data', 'keyframes', 'keyframe_ticks')
+
+    def __init__(self, seed, tick_rate, events, end_tick, data=b"", keyframes=()):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.events = events      # [(tick, code)]
+        self.end_tick = end_tick
+        self.data = data
+        self.keyframes = keyframes  # [(tick, events before it, offset, length)]
+        self.keyframe_ticks = [kf[0] for kf in keyframes]
+
+def decode(data):
+    if data[:3] != MAGIC or data[3] not in (1, VERSION):
+        raise ValueError("not a SkateShift replay")
+    seed, i = read_varint(data, 4)
+    tick_rate, i = read_varint(data, i)
+    events = []
+    tick = 0
+    while True:
+        delta, i = read_varint(data, i)
+        tick += delta
+        code = data[i]
+        i += 1
+        if code == END:
+            break
+        events.append((tick, code))
+    keyframes = []
+    if data[3] >= 2:
+        # The index is found through the footer, keyframe blobs stay in `data`
+        # until seek() needs one
+        i = FOOTER.unpack_from(data, len(data) - FOOTER.size)[0]
+        count, i = read_varint(data, i)
+        for _ in range(count):
+            entry = []
+            for _ in range(4):
+                n, i = read_varint(data, i)
+                entry.append(n)
+            keyframes.append(tuple(entry))
+    return Replay(unzigzag(seed), tick_rate, events, tick, data, keyframes)
+
+def load(path):
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+# Feeds a replay's events into a live game as its ticks come up, for use as
+# engine.advance(state, before_tick=player.feed)
+class Player:
+    __slots__ = ('replay', 'next', 'on_key', 'on_special')
+
+    def __init__(self, replay, on_key=None, on_special=None):
+        self.replay = replay
+        self.next = 0
+        self.on_key = on_key          # window key handler, defaults to the gameplay keys
+        self.on_special = on_special  # camera keys, ignored when headless
+
+    def feed(self, state):
+        events = self.replay.events
+        while self.next < len(events) and events[self.next][0] <= state.tick_count:
+            code = events[self.next][1]
+            self.next += 1
+            if code & SPECIAL:
+                if self.on_special is not None:
+                    self.on_special(code & ~SPECIAL)
+            elif self.on_key is not None:
+                self.on_key(chr(code))
+            else:
+                engine.keyboard(state, chr(code))
+
+# Runs `state` forward to `tick` (or the end of the replay), feeding the
+# player's remaining events on the way
+def run_to(state, player, tick=None):
+    replay = player.replay
+    end = replay.end_tick if tick is None else min(tick, replay.end_tick)
+    events = replay.events
+    step = engine.step
+    while player.next < len(events) and events[player.next][0] <= end:
+        event_tick = events[player.next][0]
+        while state.tick_count < event_tick and not state.over:
+            step(state)
+        if state.tick_count < event_tick:
+            break  # game over before the recording says it should be
+        player.feed(state)
+    while state.tick_count < end and not state.over:
+        step(state)
+    return state
+
+# Plays a replay headless as fast as possible, returns the finished GameState
+def play(replay, state=None):
+    if state is None:
+        state = engine.GameState(tick_rate=replay.tick_rate)
+    engine.new_game(state, replay.seed)
+    return run_to(state, Player(replay))
+
+# Game state at `tick`: restores the last keyframe at or before it and only
+# simulates the rest. Returns (state, player), the player carries on from there.
+def seek(replay, tick, state=None, on_key=None, on_special=None):
+    if state is None:
+        state = engine.GameState(tick_rate=replay.tick_rate)
+    player = Player(replay, on_key, on_special)
+    k = bisect_right(replay.keyframe_ticks, tick) - 1
+    if k >= 0:
+        _, player.next, offset, length = replay.keyframes[k]
+        engine.restore(state, replay.data[offset:offset + length])
+    else:
+        engine.new_game(state, replay.seed)
+    # Keys go through the plain engine handler while catching up
+    catch_up = Player(replay)
+    catch_up.next = player.next
+    run_to(state, catch_up, tick)
+    player.next = catch_up.next
+    return state, player
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py FILE [repeat]")
+        sys.exit(1)
+    replay = load(sys.argv[1])
+    print(f"{len(replay.data)} bytes, {len(replay.keyframes)} keyframes")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        state = play(replay)
+    elapsed = time.perf_counter() - t0
+    ticks = state.tick_count * repeat
+    print(f"seed {replay.seed}, {len(replay.events)} events, {replay.end_tick} ticks: "
+          f"score {state.score}, lives {state.player_life}")
+    print(f"played {repeat}x in {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/s, "
+          f"{ticks / replay.tick_rate / elapsed:,.0f}x real time)")
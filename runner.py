@@ -0,0 +1,187 @@
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+import engine
+from autopilot import Autopilot
+from entities import KINDS, KIND_NAMES, BIRD, HAZARD, KIND_FLAGS
+# Monte Carlo runner: plays N seeded headless games across all cores and merges
+# what happened into one summary, for tuning spawn rates and road speed without
+# hand-playing the window.
+#
+#   python runner.py --games 2000 --policy bot --road-speed 0.4 --rate shield=0.01
+#POLICIES----------------------------------------------------------------------------------
+# A policy factory takes (seed, options) and returns policy(state) -> key or None.
+# The seed is the game's, so policies with randomness are reproducible too.
+def idle_policy(seed, options):
+    return lambda state: None
+
+def random_policy(seed, options):
+    rng = random.Random(seed)
+    chance = options.get('press_chance', 0.05)
+    def policy(state):
+        if rng.random() < chance:
+            return rng.choice('ad s')
+        return None
+    return policy
+
+# Cycles through a fixed key string, one key every `script_every` ticks ('.' = no key)
+def scripted_policy(seed, options):
+    keys = options.get('script', 'a.d.d.a. .s')
+    every = options.get('script_every', 30)
+    def policy(state):
+        if state.tick_count % every == 0:
+            k = keys[(state.tick_count // every) % len(keys)]
+            if k != '.':
+                return k
+        return None
+    return policy
+
+# Reactive bot: steps into a clear lane when something is coming, otherwise
+# jumps cars/pedestrians and ducks birds when the timing works out
+def bot_policy(seed, options):
+    look = options.get('look_ahead', 12.0)
+    def hazards(state, lane):
+        lo, hi = 5 - look, 6.5
+        store = state.entities
+        found = []
+        for ref in store.near(lane, (lo + hi) / 2, (hi - lo) / 2):
+            if KIND_FLAGS[ref[0]] & HAZARD:
+                q, i = store.row(ref)
+                found.append((store.travel - q.mark[i], ref[0]))
+        return found
+
+    def policy(state):
+        lane = state.player_lane
+        ahead = hazards(state, lane)
+        if not ahead:
+            return None
+        for key, other in (('a', lane - 1), ('d', lane + 1)):
+            if -1 <= other <= 1 and not hazards(state, other):
+                return key
+        z, kind = max(ahead)  # the nearest one
+        speed = state.road_speed
+        ticks = lambda ms: ms / state.tick_ms
+        if kind == BIRD:
+            if not state.ducking and not state.jumping and z > 6.5 - ticks(engine.duck_duration) * speed:
+                return 's'
+        elif not state.jumping and 6.5 - ticks(engine.jump_duration * 5 / 6) * speed < z < 3.5 - ticks(engine.jump_duration / 6) * speed:
+            return ' '
+        return None
+    return policy
+
+# Lookahead search over lane/jump/duck presses, see autopilot.py
+def autopilot_policy(seed, options):
+    return Autopilot()
+
+POLICIES = {
+    'idle': idle_policy,
+    'random': random_policy,
+    'scripted': scripted_policy,
+    'bot': bot_policy,
+    'autopilot': autopilot_policy,
+}
+
+#ONE GAME----------------------------------------------------------------------------------
+def play_game(job):
+    seed, policy_name, max_ticks, tuning, options = job
+    state = engine.GameState(tick_rate=tuning.get('tick_rate', engine.default_tick_rate))
+    state.road_speed = tuning.get('road_speed', state.road_speed)
+    for kind, rate in tuning.get('rates', {}).items():
+        state.spawner.set_rate(kind, rate, state.entities.travel)
+    policy = POLICIES[policy_name](seed, options)
+    engine.run_headless(max_ticks, policy=policy, seed=seed, state=state)
+    return {
+        'seed': seed,
+        'ticks': state.tick_count,
+        'seconds': state.tick_count / state.tick_rate,
+        'score': state.score,
+        'died': state.over,
+        'lives_lost_to': list(state.lives_lost_to),
+        'spawned': list(state.spawned),
+    }
+
+#SUMMARY----------------------------------------------------------------------------------
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+def summarize(results):
+    seconds = [r['seconds'] for r in results]
+    scores = [r['score'] for r in results]
+    lost = [sum(r['lives_lost_to'][k] for r in results) for k in KINDS]
+    spawned = [sum(r['spawned'][k] for r in results) for k in KINDS]
+    total_lost = sum(lost) or 1
+    return {
+        'games': len(results),
+        'died': sum(r['died'] for r in results),
+        'survival_seconds': {'mean': statistics.fmean(seconds), 'p10': percentile(seconds, 0.1),
+                             'median': statistics.median(seconds), 'p90': percentile(seconds, 0.9)},
+        'score': {'mean': statistics.fmean(scores), 'p10': percentile(scores, 0.1),
+                  'median': statistics.median(scores), 'p90': percentile(scores, 0.9),
+                  'max': max(scores)},
+        'lives_lost_to': {KIND_NAMES[k]: {'total': lost[k], 'share': lost[k] / total_lost}
+                          for k in KINDS if lost[k]},
+        'spawned_per_game': {KIND_NAMES[k]: spawned[k] / len(results) for k in KINDS},
+    }
+
+def print_summary(summary, elapsed, ticks):
+    s, sc = summary['survival_seconds'], summary['score']
+    print(f"{summary['games']} games ({summary['died']} died) in {elapsed:.1f}s, {ticks / elapsed:,.0f} ticks/s")
+    print(f"survival  mean {s['mean']:.1f}s  p10 {s['p10']:.1f}s  median {s['median']:.1f}s  p90 {s['p90']:.1f}s")
+    print(f"score     mean {sc['mean']:.1f}  p10 {sc['p10']}  median {sc['median']}  p90 {sc['p90']}  max {sc['max']}")
+    print("lives lost to: " + ", ".join(f"{name} {v['total']} ({v['share']:.0%})"
+                                        for name, v in summary['lives_lost_to'].items()))
+    print("spawned/game:  " + ", ".join(f"{name} {n:.1f}" for name, n in summary['spawned_per_game'].items()))
+
+#CLI----------------------------------------------------------------------------------
+def parse_rates(specs):
+    rates = {}
+    for spec in specs:
+        name, _, value = spec.partition('=')
+        if name not in KIND_NAMES:
+            raise SystemExit(f"unknown entity kind '{name}', expected one of {', '.join(KIND_NAMES)}")
+        rates[KIND_NAMES.index(name)] = float(value)
+    return rates
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless SkateShift games in parallel")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help="first seed, games use seed..seed+games-1")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--max-seconds', type=float, default=600, help="cut off games that survive this long")
+    parser.add_argument('--workers', type=int, default=None, help="default: all cores")
+    parser.add_argument('--road-speed', type=float, default=None)
+    parser.add_argument('--tick-rate', type=int, default=engine.default_tick_rate)
+    parser.add_argument('--rate', action='append', default=[], metavar='KIND=RATE',
+                        help="spawns per unit of road distance, e.g. shield=0.01 bird=0.02")
+    parser.add_argument('--script', default=None, help="keys for the scripted policy, '.' = no key")
+    parser.add_argument('--json', default=None, help="also write the summary here")
+    args = parser.parse_args(argv)
+
+    tuning = {'tick_rate': args.tick_rate, 'rates': parse_rates(args.rate)}
+    if args.road_speed is not None:
+        tuning['road_speed'] = args.road_speed
+    options = {'script': args.script} if args.script else {}
+    max_ticks = int(args.max_seconds * args.tick_rate)
+    jobs = [(args.seed + n, args.policy, max_ticks, tuning, options) for n in range(args.games)]
+
+    t0 = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = list(pool.imap_unordered(play_game, jobs, chunksize=max(1, len(jobs) // 256)))
+    elapsed = time.perf_counter() - t0
+
+    results.sort(key=lambda r: r['seed'])
+    summary = summarize(results)
+    print_summary(summary, elapsed, sum(r['ticks'] for r in results))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'summary': summary, 'games': results}, f, indent=1)
+    return summary
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+import heapq
+
+from entities import KINDS
+# Spawn timing for the engine. Instead of rolling a chance for every kind on
+# every tick, each kind draws the road distance to its next spawn from an
+# exponential distribution and waits in a heap until the road has travelled that
+# far. Rates are per unit of road distance, so spawn density doesn't depend on
+# the tick rate or on how much the road moves per tick.
+#RATES----------------------------------------------------------------------------------
+REFERENCE_SPEED = 0.3  # road units per tick the old per-tick chances were tuned at
+# CAR, HUMAN, BIRD, LIFE, SHIELD, POWER_UP - the old per-tick chances at REFERENCE_SPEED
+SPAWN_RATES = tuple(p / REFERENCE_SPEED for p in (0.01, 0.002, 0.005, 0.001, 0.0015, 0.005))
+
+#SCHEDULER----------------------------------------------------------------------------------
+class SpawnScheduler:
+    __slots__ = ('rng', 'rates', 'heap')
+
+    def __init__(self, rng, rates=SPAWN_RATES):
+        self.rng = rng  # the game's spawns stream
+        self.rates = list(rates)
+        self.heap = []  # (travel the next spawn is due at, kind)
+
+    # Draws a fresh first event for every kind, counting from `travel`
+    def reset(self, travel):
+        expovariate = self.rng.expovariate
+        self.heap = [(travel + expovariate(rate), kind)
+                     for kind, rate in zip(KINDS, self.rates) if rate > 0]
+        heapq.heapify(self.heap)
+
+    # Changes one kind's rate, redrawing its next spawn from `travel` (0 stops it)
+    def set_rate(self, kind, rate, travel):
+        self.rates[kind] = rate
+        self.heap = [event for event in self.heap if event[1] != kind]
+        if rate > 0:
+            self.heap.append((travel + self.rng.expovariate(rate), kind))
+        heapq.heapify(self.heap)
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else float('inf')
+
+    # (at, kind) for every spawn due by `travel`, in order, scheduling the next one
+    # of each kind as it goes
+    def due(self, travel):
+        heap = self.heap
+        expovariate = self.rng.expovariate
+        events = []
+        while heap and heap[0][0] <= travel:
+            at, kind = heap[0]
+            heapq.heapreplace(heap, (at + expovariate(self.rates[kind]), kind))
+            events.append((at, kind))
+        return events
@@ -0,0 +1,46 @@
+import heapq
+# Expiry timers for the engine's timed effects (jump, duck, shield). Starting
+# an effect records when it ends and pushes that onto a heap; step() pops only
+# what is due, so nothing is re-checked on ticks where no effect runs out. "Is
+# it active" is a dict lookup.
+#
+# Restarting a running effect just pushes the new end: the old heap entry no
+# longer matches `ends` and is dropped when it comes up.
+#TIMERS----------------------------------------------------------------------------------
+class Timers:
+    __slots__ = ('ends', 'heap')
+
+    def __init__(self):
+        self.ends = {}  # effect -> sim time it ends at, running effects only
+        self.heap = []  # (end, effect), may hold stale entries
+
+    def clear(self):
+        self.ends.clear()
+        self.heap.clear()
+
+    # Runs `effect` for `duration` ms from `now`, restarting it if it is running
+    def start(self, effect, now, duration):
+        end = now + duration
+        self.ends[effect] = end
+        heapq.heappush(self.heap, (end, effect))
+
+    def active(self, effect):
+        return effect in self.ends
+
+    # Sim time `effect` ends at, None when it is not running
+    def end(self, effect):
+        return self.ends.get(effect)
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else float('inf')
+
+    # Effects that ran out by `now`, in the order they did, no longer active
+    def due(self, now):
+        heap, ends = self.heap, self.ends
+        expired = []
+        while heap and heap[0][0] <= now:
+            end, effect = heapq.heappop(heap)
+            if ends.get(effect) == end:
+                del ends[effect]
+                expired.append(effect)
+        return expired